@@ -2,13 +2,34 @@ import os
 import subprocess
 import json
 import logging
+import select
+import threading
+import atexit
+import hashlib
+import random
 import time
 import re
-from typing import Dict, Any
-from tenacity import retry, stop_after_attempt, wait_exponential
-from openai import OpenAI
+from functools import lru_cache
+from typing import Dict, Any, Optional
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_random_exponential
+from openai import OpenAI, RateLimitError, APIConnectionError, APITimeoutError, InternalServerError
 import debug_state
 
+# orjson is 2-5x faster than stdlib json for loads/dumps; fall back silently
+# if it isn't installed (it's optional in requirements.txt).
+try:
+    import orjson
+    _json_loads = orjson.loads
+
+    def _json_dumps_compact(obj) -> str:
+        return orjson.dumps(obj).decode()
+except ImportError:
+    orjson = None
+    _json_loads = json.loads
+
+    def _json_dumps_compact(obj) -> str:
+        return json.dumps(obj, separators=(",", ":"))
+
 # Valid LOG LEVELS
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -16,21 +37,87 @@ logger = logging.getLogger(__name__)
 # Constants
 MAX_TURNS = 20  # Reduced: filters applied deterministically, GPT-4o only verifies + clicks Add to table
 
-@retry(stop=stop_after_attempt(5), wait=wait_exponential(multiplier=2, min=5, max=60))
+# Per-turn action selection is schema dispatch, not deep reasoning — the mini
+# model is ~10x cheaper/faster at it. interpret_search_criteria (one-shot
+# planning) stays on gpt-4o. The loop escalates back to gpt-4o for a run if
+# the mini model keeps producing invalid JSON.
+TURN_MODEL = os.getenv("TURN_MODEL", "gpt-4o-mini")
+TURN_MODEL_FALLBACK = "gpt-4o"
+TURN_MAX_TOKENS = 200  # Largest action JSON is well under this
+
+# Action cache for the GPT-4o fallback loop: (directive hash + snapshot hash)
+# -> raw action JSON. The Clay UI is identical across runs, so a page state
+# that was already decided once doesn't need another LLM round-trip. Entries
+# are validated against the live snapshot before reuse and dropped when the
+# replayed action errors.
+_action_cache: Dict[str, str] = {}
+_ACTION_CACHE_MAX = 256
+_CACHEABLE_ACTIONS = {
+    "click", "fill", "press", "scroll", "click_by_text",
+    "fill_placeholder", "fill_label", "focus_placeholder", "type_and_enter",
+}
+
+# Static per-turn instructions + action schema. Lives in the system message
+# (sent once, prefix-cacheable by the API) instead of being re-pasted into
+# every user prompt of every turn.
+_TURN_INSTRUCTIONS = """
+INSTRUCTIONS:
+Filters have been applied programmatically. Your job is to verify and click "Add to table".
+Look for "Clear chip" buttons (indicate pills), "X filters" labels, and the "Add to table" button.
+IMPORTANT: If "Add to table" button is disabled or shows a loading indicator, use "wait" to wait for it to become enabled. Do NOT signal fail for a loading button.
+Return ONLY a JSON object with one of these structures:
+{"type": "click", "element_id": "@eX", "reason": "why"}
+{"type": "wait", "seconds": 5, "reason": "Waiting for Add to table button to become enabled"}
+{"type": "press", "key": "Enter", "reason": "Use for Enter, Escape, or other keys"}
+{"type": "scroll", "direction": "down", "pixels": 300, "reason": "Scroll to reveal hidden sections"}
+{"type": "done", "reason": "why"}
+{"type": "fail", "reason": "why"}
+"""
+
+# Full-jitter backoff so concurrent retries don't wake in lockstep and
+# re-trigger the same 429. Only transient errors are retried — a 400
+# (BadRequestError) is permanent and used to burn 5 attempts for nothing.
+@retry(
+    stop=stop_after_attempt(5),
+    wait=wait_random_exponential(multiplier=2, max=60),
+    retry=retry_if_exception_type((RateLimitError, APIConnectionError, APITimeoutError, InternalServerError)),
+)
 def call_with_retry(func, *args, **kwargs):
     return func(*args, **kwargs)
 
-openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+@lru_cache(maxsize=1)
+def _openai_client() -> OpenAI:
+    """Construct the OpenAI client on first use. Import-time construction
+    made every consumer of this module (connectivity tests, cookie tools)
+    pay TLS-pool setup even when no model call ever happens."""
+    return OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+def _strip_code_fence(text: str) -> str:
+    """Remove a surrounding markdown code fence from an LLM reply.
+
+    Fast path: JSON mode means fences should almost never appear, so the
+    common case is a single startswith check and no string copies.
+    """
+    if not text.startswith("```"):
+        return text
+    if text.startswith("```json"):
+        text = text[7:]
+    else:
+        text = text[3:]
+    if text.endswith("```"):
+        text = text[:-3]
+    return text.strip()
+
 
 def parse_js_json(result):
     """Parse JSON from agent-browser eval results, handling double-encoding."""
     if not isinstance(result, str):
         return result
     try:
-        data = json.loads(result)
+        data = _json_loads(result)
         # Handle double-encoded JSON: agent-browser may wrap string results in quotes
         if isinstance(data, str):
-            data = json.loads(data)
+            data = _json_loads(data)
         return data
     except (json.JSONDecodeError, TypeError):
         return result  # Return raw string if not valid JSON
@@ -48,97 +135,674 @@ os.environ["AGENT_BROWSER_ARGS"] = (
 )
 os.environ["AGENT_BROWSER_USER_AGENT"] = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36"
 
+# Placeholders substituted into the directive template. JSON-valued keys are
+# serialized with json.dumps, the rest with str().
+_PLACEHOLDER_RE = re.compile(r"\{\{(\w+)\}\}")
+_JSON_PLACEHOLDERS = {"ai_titles", "ai_locations", "ai_seniority", "ai_industries", "ai_excludeKeywords"}
+_directive_template_cache: Dict[str, tuple] = {}  # path -> (mtime_ns, text)
+
+
+def _read_directive_template(file_path: str) -> str:
+    """Read (and memoize) the directive markdown, keyed by mtime.
+
+    Directives are living documents — a stat per run keeps edits visible
+    immediately while unchanged files skip the read and its allocation."""
+    mtime = os.stat(file_path).st_mtime_ns
+    cached = _directive_template_cache.get(file_path)
+    if cached is None or cached[0] != mtime:
+        with open(file_path, "r") as f:
+            cached = (mtime, f.read())
+        _directive_template_cache[file_path] = cached
+    return cached[1]
+
+
 def load_directive(file_path: str, context: Dict[str, Any]) -> str:
-    """Reads the directive markdown and substitutes placeholders."""
+    """Reads the directive markdown and substitutes placeholders in one regex pass."""
     try:
-        with open(file_path, "r") as f:
-            template = f.read()
-        
-        # Original field substitutions
-        text = template.replace("{{targetTitles}}", str(context.get("targetTitles", "")))
-        text = text.replace("{{targetGeos}}", str(context.get("targetGeos", "")))
-        text = text.replace("{{seniority}}", str(context.get("seniority", "")))
-        text = text.replace("{{excludeKeywords}}", str(context.get("excludeKeywords", "")))
-        
-        # AI-interpreted criteria substitutions (Phase 3)
-        text = text.replace("{{ai_titles}}", json.dumps(context.get("ai_titles", [])))
-        text = text.replace("{{ai_locations}}", json.dumps(context.get("ai_locations", [])))
-        text = text.replace("{{ai_seniority}}", json.dumps(context.get("ai_seniority", [])))
-        text = text.replace("{{ai_industries}}", json.dumps(context.get("ai_industries", [])))
-        text = text.replace("{{ai_excludeKeywords}}", json.dumps(context.get("ai_excludeKeywords", [])))
-        text = text.replace("{{ai_confidence}}", str(context.get("ai_confidence", "unknown")))
-        text = text.replace("{{ai_reasoning}}", str(context.get("ai_reasoning", "")))
-        
-        text = text.replace("{{ai_reasoning}}", str(context.get("ai_reasoning", "")))
-        
-        # Credentials (Phase 3 fallback)
-        text = text.replace("{{clay_email}}", str(context.get("clay_email", "")))
-        text = text.replace("{{clay_password}}", str(context.get("clay_password", "")))
-        
-        return text
+        template = _read_directive_template(file_path)
+
+        def _substitute(match: "re.Match") -> str:
+            key = match.group(1)
+            if key in _JSON_PLACEHOLDERS:
+                # Compact separators: the rendered directive is prompt payload,
+                # so avoid the default ", " padding on every list element
+                return json.dumps(context.get(key, []), separators=(",", ":"))
+            if key == "ai_confidence":
+                return str(context.get(key, "unknown"))
+            return str(context.get(key, ""))
+
+        return _PLACEHOLDER_RE.sub(_substitute, template)
     except FileNotFoundError:
         logger.error(f"Directive file not found: {file_path}")
         return "ERROR: Directive Missing"
 
+# Diagnostics are informational — sample every N turns instead of all of them
+_DIAG_SAMPLE_EVERY = 5
+
+
 def log_resource_diagnostics(turn: int):
-    """Log container resource metrics for debugging EAGAIN issues."""
+    """Log container resource metrics for debugging EAGAIN issues.
+
+    Sampled every _DIAG_SAMPLE_EVERY turns (turn 1 included) and built from
+    /proc and statvfs directly — the old df/ps subprocess pair added two
+    forks per turn, which is exactly the resource pressure this log exists
+    to diagnose.
+    """
+    if turn != 1 and turn % _DIAG_SAMPLE_EVERY != 0:
+        return
     try:
-        shm_proc = subprocess.run(
-            ["df", "-h", "/dev/shm"], capture_output=True, text=True, timeout=5
-        )
+        shm = os.statvfs("/dev/shm")
+        shm_free_mb = shm.f_bavail * shm.f_frsize // (1024 * 1024)
+        shm_total_mb = shm.f_blocks * shm.f_frsize // (1024 * 1024)
         fd_count = len(os.listdir("/proc/self/fd"))
-        # Phase 6: Log process count to detect process limit (nproc) exhaustion
-        ps_out = subprocess.run(["ps", "-e", "--no-headers"], capture_output=True, text=True)
-        proc_count = len(ps_out.stdout.strip().split('\n')) if ps_out.stdout.strip() else 0
-        
-        logger.info(f"[DIAG] Turn {turn} | SHM: {shm_proc.stdout.strip().splitlines()[-1] if shm_proc.stdout else 'N/A'} | FDs: {fd_count} | Procs: {proc_count}")
+        # Phase 6: process count to detect process limit (nproc) exhaustion
+        proc_count = sum(1 for entry in os.listdir("/proc") if entry.isdigit())
+
+        logger.info(f"[DIAG] Turn {turn} | SHM: {shm_free_mb}M free / {shm_total_mb}M | FDs: {fd_count} | Procs: {proc_count}")
     except Exception as e:
         logger.warning(f"[DIAG] Turn {turn} diagnostics failed: {e}")
 
-def run_agent_browser_command(args: list) -> str:
-    """Runs a subcommand of the agent-browser CLI."""
+class _AgentBrowserSession:
+    """
+    Long-lived agent-browser process driven over stdin/stdout.
+
+    Spawning a fresh `agent-browser` subprocess per command pays Node startup +
+    daemon handshake on every snapshot/click/fill — hundreds of times per run.
+    This session spawns `agent-browser --stdio` ONCE and sends each command as a
+    newline-delimited JSON request ({"id": N, "cmd": [...]}), reading one JSON
+    reply line back ({"id": N, "code": int, "stdout": ..., "stderr": ...}).
+
+    If the installed CLI does not support --stdio (process exits or the probe
+    gets no reply), the session marks itself unsupported and every call falls
+    back to the original one-subprocess-per-command path. Disable explicitly
+    with AGENT_BROWSER_STDIO=false.
+    """
+
+    PROBE_TIMEOUT = 3
+
+    def __init__(self):
+        self._proc = None
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._unsupported = os.environ.get("AGENT_BROWSER_STDIO", "true").lower() != "true"
+
+    def _spawn(self) -> bool:
+        """Start the stdio process and probe it. Returns True if usable."""
+        try:
+            self._proc = subprocess.Popen(
+                ["agent-browser", "--stdio"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+                bufsize=1,
+            )
+        except Exception as e:
+            logger.info(f"[STDIO] Could not spawn agent-browser --stdio: {e}")
+            self._proc = None
+            return False
+
+        # Probe: an unknown flag makes the CLI exit immediately; a real stdio
+        # mode answers the request (even if only with an error payload).
+        reply = self._roundtrip(_CMD_GET_URL, timeout=self.PROBE_TIMEOUT)
+        if reply is None:
+            logger.info("[STDIO] agent-browser --stdio not supported; falling back to per-command subprocess")
+            self._kill()
+            return False
+        logger.info("[STDIO] Persistent agent-browser session established")
+        return True
+
+    def _kill(self):
+        if self._proc is not None:
+            try:
+                self._proc.kill()
+            except OSError:
+                pass
+            self._proc = None
+
+    def _roundtrip(self, args: list, timeout: int):
+        """Send one command and read its reply. Returns the reply dict or None."""
+        if self._proc is None or self._proc.poll() is not None:
+            return None
+        self._next_id += 1
+        req_id = self._next_id
+        try:
+            self._proc.stdin.write(_json_dumps_compact({"id": req_id, "cmd": args}) + "\n")
+            self._proc.stdin.flush()
+            deadline = time.monotonic() + timeout
+            while time.monotonic() < deadline:
+                remaining = deadline - time.monotonic()
+                ready, _, _ = select.select([self._proc.stdout], [], [], max(remaining, 0))
+                if not ready:
+                    break
+                line = self._proc.stdout.readline()
+                if not line:
+                    break
+                try:
+                    reply = _json_loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if reply.get("id") == req_id:
+                    return reply
+        except (OSError, ValueError):
+            pass
+        # Timeout or broken pipe: the stream is desynced — kill and respawn later.
+        self._kill()
+        return None
+
+    def send(self, args: list, timeout: int = 60):
+        """
+        Run a command on the persistent session.
+        Returns (returncode, stdout, stderr), or None if the session is
+        unavailable (caller should fall back to a one-shot subprocess).
+        """
+        if self._unsupported:
+            return None
+        with self._lock:
+            if self._proc is None or self._proc.poll() is not None:
+                if not self._spawn():
+                    self._unsupported = True
+                    return None
+            reply = self._roundtrip(args, timeout)
+            if reply is None:
+                return None
+            return reply.get("code", 0), reply.get("stdout", ""), reply.get("stderr", "")
+
+    def send_batch(self, cmds: list, timeout: int = 60):
+        """
+        Pipeline several commands in one pass: write every request line first,
+        then read the replies. Saves one write/read round-trip per command
+        compared to calling send() sequentially.
+        Returns a list of (returncode, stdout, stderr) in command order, or
+        None if the session is unavailable.
+        """
+        if self._unsupported or not cmds:
+            return None
+        with self._lock:
+            if self._proc is None or self._proc.poll() is not None:
+                if not self._spawn():
+                    self._unsupported = True
+                    return None
+            ids = []
+            try:
+                for args in cmds:
+                    self._next_id += 1
+                    ids.append(self._next_id)
+                    self._proc.stdin.write(_json_dumps_compact({"id": self._next_id, "cmd": args}) + "\n")
+                self._proc.stdin.flush()
+            except (OSError, ValueError):
+                self._kill()
+                return None
+
+            replies = {}
+            deadline = time.monotonic() + timeout
+            try:
+                while len(replies) < len(ids) and time.monotonic() < deadline:
+                    remaining = deadline - time.monotonic()
+                    ready, _, _ = select.select([self._proc.stdout], [], [], max(remaining, 0))
+                    if not ready:
+                        break
+                    line = self._proc.stdout.readline()
+                    if not line:
+                        break
+                    try:
+                        reply = _json_loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if reply.get("id") in ids:
+                        replies[reply["id"]] = reply
+            except (OSError, ValueError):
+                pass
+            if len(replies) < len(ids):
+                # Desynced mid-batch — kill so the next call respawns cleanly.
+                self._kill()
+                return None
+            return [
+                (replies[i].get("code", 0), replies[i].get("stdout", ""), replies[i].get("stderr", ""))
+                for i in ids
+            ]
+
+    def close(self):
+        with self._lock:
+            self._kill()
+
+
+_browser_session = _AgentBrowserSession()
+atexit.register(_browser_session.close)
+
+# Hoisted from run_agent_browser_command: the headed decision never changes
+# at runtime, and that function runs for every browser interaction.
+_HEADED = os.environ.get("AGENT_BROWSER_HEADED") == "true"
+
+# Per-verb command timeouts. A hung `get url` shouldn't block the loop for
+# the same 60s a cold `open` legitimately needs — fast verbs fail fast so
+# the caller's error handling can react. Values are deliberately generous
+# versus the good case (Clay's React app can be slow under load).
+_COMMAND_TIMEOUTS = {
+    "open": 60,
+    "snapshot": 30,
+    "screenshot": 30,
+    "eval": 20,
+    "close": 20,
+    "click": 15,
+    "fill": 15,
+    "get": 10,
+    "press": 10,
+    "scroll": 10,
+}
+_DEFAULT_COMMAND_TIMEOUT = 60
+
+# Hot-path argv constants. These exact commands run dozens of times per
+# record (every pill, every turn), so build each list once instead of
+# allocating a fresh literal per call. Nothing downstream mutates args —
+# run_agent_browser_command only ever rebinds — so sharing is safe.
+_CMD_PRESS_ENTER = ["press", "Enter"]
+_CMD_PRESS_ESCAPE = ["press", "Escape"]
+_CMD_SNAPSHOT_I = ["snapshot", "-i"]
+_CMD_GET_URL = ["get", "url"]
+
+
+class CommandResult(str):
+    """Command output that also carries success as an attribute.
+
+    Subclasses str so every existing consumer (substring scans, slicing,
+    regexes) keeps working unchanged; checks can read res.ok instead of
+    re-scanning the text for the 'Error:' prefix."""
+    ok = True
+
+    def __new__(cls, value: str, ok: bool = True):
+        self = super().__new__(cls, value)
+        self.ok = ok
+        return self
+
+
+def _handle_command_result(cmd, returncode: int, stdout: str, stderr: str) -> CommandResult:
+    """Shared success/error handling for both the stdio and subprocess paths."""
+    if returncode != 0:
+        # Phase 6: Gracefully handle 'daemon already running' warning.
+        # This can cause a non-zero exit code but doesn't mean the command failed.
+        if "daemon already running" in stderr:
+            logger.info("Agent browser daemon already running. Proceeding...")
+            return CommandResult(stdout or "Success: Daemon already running")
+
+        logger.error(f"Command failed: {cmd}\nStderr: {stderr}\nStdout: {stdout}")
+        return CommandResult(f"Error: {stderr} | {stdout}", ok=False)
+
+    return CommandResult(stdout)
+
+
+# Shared env for CLI subprocesses, copied once. Chromium pushes this
+# process's FD count high, and the default close_fds=True walk over every
+# descriptor on each fork is measurable at that count; the agent-browser
+# child only talks to its daemon socket, so inheriting FDs is harmless.
+_BASE_ENV = os.environ.copy()
+
+
+def _run_streaming_contains(cmd: list, contains: str, timeout: int = 60) -> str:
+    """
+    Run a one-shot subprocess but stop reading as soon as `contains` appears
+    in its output. Snapshots can be MBs of text; when the caller only needs a
+    substring check, this avoids buffering (and decoding) the full payload.
+    Returns the output read so far — guaranteed to include the marker on match.
+    """
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+                            env=_BASE_ENV, close_fds=False)
+    chunks = []
     try:
-        # Full command: agent-browser <args>
-        cmd = ["agent-browser"] + args
-        
-        # Local Debugging: Support headed mode via env var
-        if os.environ.get("AGENT_BROWSER_HEADED") == "true" and "open" in args:
-             if "--headed" not in cmd:
-                 cmd.append("--headed")
+        deadline = time.monotonic() + timeout
+        for line in proc.stdout:
+            chunks.append(line)
+            if contains in line:
+                proc.kill()
+                break
+            if time.monotonic() > deadline:
+                proc.kill()
+                break
+    finally:
+        proc.stdout.close()
+        proc.wait()
+    return "".join(chunks)
 
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
-        
-        # Phase 4 Update: Ignore daemon-already-running warnings in stderr
-        # These warnings can cause a non-zero exit code but the action may still succeed.
-        has_daemon_warning = "daemon already running" in result.stderr
-        
-        if result.returncode != 0:
-            # Phase 6: Gracefully handle 'daemon already running' warning.
-            # This can cause a non-zero exit code but doesn't mean the command failed.
-            if "daemon already running" in result.stderr:
-                logger.info("Agent browser daemon already running. Proceeding...")
-                return result.stdout or "Success: Daemon already running"
-            
-            logger.error(f"Command failed: {cmd}\nStderr: {result.stderr}\nStdout: {result.stdout}")
-            return f"Error: {result.stderr} | {result.stdout}"
-        
-        return result.stdout
+
+# Snapshot cache: serving a just-taken snapshot again is pure waste (the
+# accessibility-tree walk is the most expensive verb we issue). Entries are
+# keyed by the full argv (plain `snapshot` and `snapshot -i` differ) and
+# valid only while no DOM-mutating verb has run since AND the entry is
+# younger than the TTL — the TTL must stay below the 1 s poll interval of
+# wait_for_ref/_wait_for_clay_context so readiness polling still sees
+# fresh trees while the page loads.
+_SNAPSHOT_CACHE_TTL = 0.75
+_MUTATING_VERBS = {"open", "click", "fill", "press", "eval", "scroll", "close"}
+_mutation_seq = 0
+_snapshot_cache: Dict[tuple, tuple] = {}  # argv -> (seq, taken_at, output)
+
+
+def _bump_mutation_seq():
+    global _mutation_seq
+    _mutation_seq += 1
+    _snapshot_cache.clear()
+
+
+def run_agent_browser_command(args: list, contains: Optional[str] = None) -> str:
+    """Runs a subcommand of the agent-browser CLI.
+
+    contains: optional marker for containment-only callers. When set and the
+    persistent session is unavailable, output is streamed and reading stops
+    early once the marker appears, instead of buffering the full snapshot.
+    """
+    verb = args[0] if args else ""
+    if verb == "snapshot":
+        cached = _snapshot_cache.get(tuple(args))
+        if cached and cached[0] == _mutation_seq and time.monotonic() - cached[1] < _SNAPSHOT_CACHE_TTL:
+            return cached[2]
+    elif verb in _MUTATING_VERBS:
+        _bump_mutation_seq()
+    try:
+        # Local Debugging: Support headed mode via env var (decision hoisted
+        # to import time — only `open` commands pay the arg checks)
+        if _HEADED and args and args[0] == "open" and "--headed" not in args:
+            args = args + ["--headed"]
+
+        timeout = _COMMAND_TIMEOUTS.get(args[0] if args else "", _DEFAULT_COMMAND_TIMEOUT)
+
+        # Fast path: persistent stdio session (no fork/exec per command)
+        session_result = _browser_session.send(args, timeout=timeout)
+        if session_result is not None:
+            returncode, stdout, stderr = session_result
+            out = _handle_command_result(["agent-browser"] + args, returncode, stdout, stderr)
+        else:
+            # Fallback: one subprocess per command (original behavior)
+            cmd = ["agent-browser"] + args
+            if contains is not None:
+                return _run_streaming_contains(cmd, contains, timeout=timeout)
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout,
+                                    env=_BASE_ENV, close_fds=False)
+            out = _handle_command_result(cmd, result.returncode, result.stdout, result.stderr)
+        if verb == "snapshot" and not out.startswith("Error:"):
+            _snapshot_cache[tuple(args)] = (_mutation_seq, time.monotonic(), out)
+        return out
     except Exception as e:
         logger.error(f"Command exception: {e}")
-        return str(e)
+        return CommandResult(str(e), ok=False)
+
+def run_agent_browser_batch(cmds: list) -> list:
+    """
+    Run several agent-browser commands, pipelined over the persistent stdio
+    session when available (all requests written before replies are read).
+    Falls back to sequential run_agent_browser_command calls otherwise.
+    Returns one result string per command, in order.
+    """
+    try:
+        if any(args and args[0] in _MUTATING_VERBS for args in cmds):
+            _bump_mutation_seq()
+        batch_result = _browser_session.send_batch(cmds)
+        if batch_result is not None:
+            results = [
+                _handle_command_result(["agent-browser"] + args, code, out, err)
+                for args, (code, out, err) in zip(cmds, batch_result)
+            ]
+            for args, out in zip(cmds, results):
+                if args and args[0] == "snapshot" and not out.startswith("Error:"):
+                    _snapshot_cache[tuple(args)] = (_mutation_seq, time.monotonic(), out)
+            return results
+    except Exception as e:
+        logger.error(f"Batch command exception: {e}")
+    return [run_agent_browser_command(args) for args in cmds]
+
+
+def backoff_call(fn, is_ok, attempts: int = 3, base: float = 0.5, cap: float = 5.0):
+    """
+    Call fn() until is_ok(result) is true or attempts run out, sleeping a
+    jittered exponential backoff between tries. Returns the last result, so
+    callers still see (and can report) the final error on exhaustion. Used
+    where a browser action can fail transiently mid-React-render but usually
+    succeeds on a quick retry.
+    """
+    result = fn()
+    for attempt in range(1, attempts):
+        if is_ok(result):
+            return result
+        delay = min(cap, base * (2 ** (attempt - 1))) * (0.5 + random.random() / 2)
+        time.sleep(delay)
+        result = fn()
+    return result
+
+
+def wait_for(predicate, timeout: float = 20, interval: float = 0.5):
+    """
+    Poll predicate() until it returns a truthy value or the timeout elapses.
+    Returns the last value predicate returned, so callers get the payload
+    (snapshot, URL, ...) on success and a falsy value on timeout.
+    Replaces worst-case-tuned time.sleep() waits with actual-readiness polling.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        value = predicate()
+        if value or time.monotonic() >= deadline:
+            return value
+        time.sleep(interval)
+
+
+def wait_for_dom_change(timeout: float = 2.0, settle: float = 0.3) -> bool:
+    """
+    Wait until the page DOM mutates, instead of sleeping a fixed interval.
+
+    Arms a MutationObserver that flips a window flag on the first mutation,
+    then polls the flag. Returns as soon as the UI actually reacted (plus a
+    short settle for the React re-render), or after `timeout` if nothing
+    changed — so the worst case matches the old fixed sleep.
+    """
+    arm_js = """
+        window.__rrDomChanged = false;
+        if (window.__rrDomObserver) { window.__rrDomObserver.disconnect(); }
+        window.__rrDomObserver = new MutationObserver(() => {
+            window.__rrDomChanged = true;
+            window.__rrDomObserver.disconnect();
+        });
+        window.__rrDomObserver.observe(document.body, {childList: true, subtree: true, attributes: true});
+        'armed'
+    """
+    res = run_agent_browser_command(["eval", arm_js])
+    if res.startswith("Error:"):
+        time.sleep(timeout)  # Observer couldn't arm — fall back to the fixed wait
+        return False
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        flag = run_agent_browser_command(["eval", "window.__rrDomChanged"])
+        if "true" in flag.lower():
+            time.sleep(settle)
+            return True
+        time.sleep(0.2)
+    return False
+
+
+def wait_for_ref(element_label: str, timeout: float = 20, interval: float = 1.0):
+    """
+    Poll snapshots until element_label resolves to a ref.
+    Returns (ref, last_snapshot); ref is None if the deadline elapses.
+    The snapshot is returned so callers can parse additional refs from it
+    without paying another round-trip.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        snapshot = run_agent_browser_command(["snapshot"])
+        ref = parse_ref(snapshot, element_label)
+        if ref or time.monotonic() >= deadline:
+            return ref, snapshot
+        time.sleep(interval)
+
+
+def _wait_for_url(predicate, timeout: float = 20, interval: float = 1.0) -> str:
+    """Poll 'get url' until predicate(url) is true. Returns the last URL seen."""
+    def check():
+        url = run_agent_browser_command(_CMD_GET_URL).strip()
+        return url if url and predicate(url.lower()) else ""
+    return wait_for(check, timeout=timeout, interval=interval)
+
+
+def _wait_for_clay_context(timeout: float = 20) -> str:
+    """
+    Wait until the Clay app has rendered enough to tell login state:
+    either login markers are visible, or we're on the find-people page with a
+    populated snapshot. Returns the last snapshot (may be partial on timeout).
+    """
+    def check():
+        snap = run_agent_browser_command(["snapshot"])
+        if _LOGIN_MARKER_RE.search(snap) or "Welcome back" in snap:
+            return snap
+        url = run_agent_browser_command(_CMD_GET_URL).strip()
+        if "find-people" in url.lower() and len(snap) > 2000:
+            return snap
+        return ""
+    return wait_for(check, timeout=timeout, interval=1.0)
+
+
+# One case-insensitive C-level scan for "needs login?" checks, instead of
+# three sequential substring passes plus a full snapshot.lower() copy.
+_LOGIN_MARKER_RE = re.compile(r"log ?in|sign in", re.IGNORECASE)
+
+# Module-level JS templates for the agent loop's click_by_text/scroll actions.
+# Built once; parameters are injected via %-format with json.dumps escaping,
+# so the scripts stay near-identical across calls (cheaper for the engine's
+# script cache) and quoting is handled instead of hand-escaped.
+_CLICK_BY_TEXT_JS = """
+    const target = %s;
+    let btns = document.querySelectorAll('button, a, [role="button"], [class*="button"]');
+    let found = null;
+    for (let b of btns) {
+        if (b.textContent.trim().toLowerCase().includes(target)) {
+            found = b;
+            break;
+        }
+    }
+    if (found) { found.scrollIntoView(); found.click(); 'Clicked: ' + found.textContent.trim() }
+    else { 'Button not found: ' + target }
+"""
+
+_FILL_BY_TEXT_JS = """
+    const t = %s.replace(/"/g, '\\\\"');
+    const v = %s;
+    let el = document.querySelector(
+        `input[placeholder="${t}"], input[aria-label="${t}"], [placeholder="${t}"], [aria-label="${t}"]`
+    ) || document.querySelector(
+        `input[placeholder*="${t}"], input[aria-label*="${t}"]`
+    );
+    if (el) {
+        el.focus(); el.click();
+        document.execCommand('insertText', false, v);
+        el.dispatchEvent(new KeyboardEvent('keydown', {key: 'Enter', bubbles: true}));
+        'Filled'
+    } else { 'Element not found' }
+"""
+
+_RESET_SCROLL_JS = """
+    let panels = document.querySelectorAll('[class*="sidebar"], [class*="filter"], [class*="panel"], [class*="scroll"]');
+    for (let p of panels) { p.scrollTop = 0; }
+    window.scrollTo(0, 0);
+    'Reset scroll'
+"""
+
+_SCROLL_JS = """
+    let panel = document.querySelector('[data-rr-scroll]');
+    if (!panel) {
+        panel = document.querySelector('[class*="sidebar"]')
+            || document.querySelector('[class*="filter"]')
+            || document.querySelector('[class*="panel"]');
+        if (panel) { panel.setAttribute('data-rr-scroll', '1'); }
+    }
+    if (panel) { panel.scrollBy(0, %d); 'Scrolled panel' }
+    else { window.scrollBy(0, %d); 'Scrolled window' }
+"""
+
+# One-shot page diagnostics: url, title, bot-detection flag and login
+# markers in a single eval instead of separate snapshot / get url / eval
+# round-trips — and the values are an atomic view of one page state.
+_DIAG_JS = """
+    JSON.stringify({
+        url: location.href,
+        title: document.title,
+        webdriver: navigator.webdriver === true,
+        hasLogin: /log ?in|sign in/i.test(document.body ? document.body.textContent : ''),
+        hasWelcome: document.body ? document.body.textContent.includes('Welcome back') : false
+    })
+"""
+
+_REF_RE = re.compile(r"\[ref=([^\]]+)\]")
+
+# Detects a comma-separated item of <=3 chars (e.g. the state in "Austin, TX")
+# — such values are a single entry, not a list of pills to split.
+_SHORT_ITEM_RE = re.compile(r"(?:^|,)\s*(?=\S)[^,]{1,3}(?<=\S)\s*(?:,|$)")
+
+
+@lru_cache(maxsize=128)
+def _label_line_re(element_label: str):
+    """Compiled multiline regex matching any snapshot line containing the label.
+
+    Cached per label: the same handful of labels (login fields, filter
+    sections) are looked up on every run, and a C-level regex scan beats
+    splitting the whole snapshot into a line list and case-folding each line."""
+    return re.compile(r"^.*" + re.escape(element_label) + r".*$", re.IGNORECASE | re.MULTILINE)
+
 
 def parse_ref(snapshot: str, element_label: str) -> str:
     """Parse snapshot text to find ref (e.g., 'e5') for a given element label."""
     if not snapshot:
         return None
-    for line in snapshot.split('\n'):
-        if element_label.lower() in line.lower():
-            # Format: - textbox "email address" [ref=e2]
-            parts = line.split('[ref=')
-            if len(parts) > 1:
-                return parts[1].split(']')[0]
+    # Format: - textbox "email address" [ref=e2]
+    for line_match in _label_line_re(element_label).finditer(snapshot):
+        match = _REF_RE.search(line_match.group(0))
+        if match:
+            return match.group(1)
     return None
 
+
+def parse_refs(snapshot: str, element_labels) -> Dict[str, str]:
+    """Find refs for several labels in a single pass over the snapshot.
+
+    Returns {label: ref} with the first match per label; labels with no
+    match are absent. Cheaper than calling parse_ref once per label when
+    multiple elements come from the same snapshot.
+    """
+    result: Dict[str, str] = {}
+    if not snapshot:
+        return result
+    wanted = [(label, label.lower()) for label in element_labels]
+    for line in snapshot.split('\n'):
+        line_lower = line.lower()
+        for label, label_lower in wanted:
+            if label in result or label_lower not in line_lower:
+                continue
+            match = _REF_RE.search(line)
+            if match:
+                result[label] = match.group(1)
+        if len(result) == len(wanted):
+            break
+    return result
+
+# Snapshot lines worth keeping when pruning for the LLM prompt: anything
+# clickable/fillable (has a ref) plus the text markers the turn prompt tells
+# the model to look for.
+_PRUNE_KEEP_MARKERS = ("[ref=", "filter", "clear chip", "add to table", "row")
+
+
+def _prune_snapshot_for_prompt(snapshot: str) -> str:
+    """Drop non-interactive snapshot lines before prompt truncation.
+
+    Clay's accessibility tree is mostly chrome and static text the model
+    never acts on. Keeping only ref-bearing lines (and the few text markers
+    the prompt references) usually fits the whole page under the char cap,
+    so head+tail truncation doesn't cut filter sections out of the middle.
+    """
+    kept = []
+    for line in snapshot.split('\n'):
+        line_lower = line.lower()
+        if any(marker in line_lower for marker in _PRUNE_KEEP_MARKERS):
+            kept.append(line)
+    pruned = '\n'.join(kept)
+    logger.info(f"Snapshot pruned for prompt: {len(snapshot)} -> {len(pruned)} chars")
+    return pruned
+
+
 def _find_combobox_between(snapshot, after_text, before_text):
     """Find first combobox ref between two text markers in -i snapshot.
     Used to locate pill input fields that lose their labels after pills are added."""
@@ -190,35 +854,58 @@ def _expand_section(snapshot, section_text):
     if not _is_section_expanded(snapshot, ref):
         run_agent_browser_command(["click", f"@{ref}"])
         time.sleep(1)
-        snapshot = run_agent_browser_command(["snapshot", "-i"])
+        snapshot = run_agent_browser_command(_CMD_SNAPSHOT_I)
     return snapshot, True
 
 
+# Placeholders/labels that came up empty, so repeat lookups skip the eval
+# round-trip while the page hasn't changed. Cleared whenever the turn loop
+# sees a new page state (focusing an element that exists always needs the
+# eval for its side effect, so only misses are cacheable).
+_focus_miss_cache = set()
+
+
 def focus_input_by_text(text: str) -> str:
     """Focus an input element by placeholder, aria-label, or partial match.
     Returns the eval result string. Check for 'Element not found' to detect failure."""
-    # Escape quotes for JS
-    safe_text = text.replace('"', '\\"')
+    cache_key = text.lower()
+    if cache_key in _focus_miss_cache:
+        logger.info(f"Focus lookup for '{text}' skipped — known missing on this page state")
+        return "Element not found (cached)"
+    # json.dumps gives a correctly escaped JS string literal
+    safe_text = json.dumps(text)
+    # Two native lookups: exact-match union first, then attribute-contains
+    # union — replaces four querySelector calls + a JS loop over every input.
     js_code = f"""
-        let el = document.querySelector('input[placeholder="{safe_text}"]')
-            || document.querySelector('input[aria-label="{safe_text}"]')
-            || document.querySelector('[placeholder="{safe_text}"]')
-            || document.querySelector('[aria-label="{safe_text}"]');
-        if (!el) {{
-            // Partial match fallback
-            let inputs = document.querySelectorAll('input');
-            for (let inp of inputs) {{
-                if ((inp.placeholder && inp.placeholder.includes('{safe_text}'))
-                    || (inp.getAttribute('aria-label') && inp.getAttribute('aria-label').includes('{safe_text}'))) {{
-                    el = inp;
-                    break;
-                }}
-            }}
-        }}
+        const t = {safe_text}.replace(/"/g, '\\\\"');
+        let el = document.querySelector(
+            `input[placeholder="${{t}}"], input[aria-label="${{t}}"], [placeholder="${{t}}"], [aria-label="${{t}}"]`
+        ) || document.querySelector(
+            `input[placeholder*="${{t}}"], input[aria-label*="${{t}}"]`
+        );
         if (el) {{ el.focus(); el.click(); 'Focused' }}
         else {{ 'Element not found' }}
     """
-    return run_agent_browser_command(["eval", js_code])
+    result = run_agent_browser_command(["eval", js_code])
+    if "Element not found" in result:
+        _focus_miss_cache.add(cache_key)
+    return result
+
+def _parse_diag_result(res: str) -> Dict[str, Any]:
+    """Parse a _DIAG_JS eval result into a dict; {} if the eval failed."""
+    try:
+        start = res.index("{")
+        end = res.rindex("}") + 1
+        return _json_loads(res[start:end])
+    except (ValueError, TypeError):
+        logger.warning(f"Page diagnostics eval failed: {res[:200]}")
+        return {}
+
+
+def _page_diagnostics() -> Dict[str, Any]:
+    """Run _DIAG_JS and return the parsed dict; {} if the eval failed."""
+    return _parse_diag_result(run_agent_browser_command(["eval", _DIAG_JS]))
+
 
 def perform_login() -> bool:
     """
@@ -232,22 +919,20 @@ def perform_login() -> bool:
         logger.error("CLAY_EMAIL or CLAY_PASSWORD not set in environment")
         raise ValueError("CLAY_EMAIL or CLAY_PASSWORD not set in environment")
     
-    # STEP 1: Open login page + LONG WAIT (React app render)
+    # STEP 1: Open login page + wait for the React app to render the form
     logger.info("Login Step 1: Opening login page...")
     run_agent_browser_command(["open", "https://app.clay.com/login"])
-    time.sleep(15)
-    
-    # STEP 2: Snapshot + Fill Email
+
+    # STEP 2: Poll until the email field appears (was a fixed 15s sleep)
     logger.info("Login Step 2: Filling email...")
-    snapshot = run_agent_browser_command(["snapshot"])
-    email_ref = parse_ref(snapshot, 'textbox "email address"')
-    
+    email_ref, snapshot = wait_for_ref('textbox "email address"', timeout=25)
+
     if not email_ref:
         logger.error(f"Could not find email field. Snapshot preview: {snapshot[:500]}")
         raise Exception("Could not find email field")
     
     run_agent_browser_command(["fill", f"@{email_ref}", email])
-    
+
     # STEP 3: Click Continue (NOT press Enter)
     cont_ref = parse_ref(snapshot, 'button "Continue"')
     if cont_ref:
@@ -255,22 +940,12 @@ def perform_login() -> bool:
         run_agent_browser_command(["click", f"@{cont_ref}"])
     else:
         logger.info("No Continue button found in snapshot, pressing Enter...")
-        run_agent_browser_command(["press", "Enter"])
+        run_agent_browser_command(_CMD_PRESS_ENTER)
     
-    time.sleep(10)  # Wait for password screen
-    
-    # STEP 4: Snapshot + Fill Password
+    # STEP 4: Poll until the password screen renders (was 10s sleep + 5s retry)
     logger.info("Login Step 4: Filling password...")
-    pass_snapshot = run_agent_browser_command(["snapshot"])
-    pass_ref = parse_ref(pass_snapshot, 'textbox "password"')
-    
-    if not pass_ref:
-        # Retry once after 5s
-        logger.info("Password field not found, waiting 5s for retry...")
-        time.sleep(5)
-        pass_snapshot = run_agent_browser_command(["snapshot"])
-        pass_ref = parse_ref(pass_snapshot, 'textbox "password"')
-    
+    pass_ref, pass_snapshot = wait_for_ref('textbox "password"', timeout=20)
+
     if not pass_ref:
         logger.error(f"Could not find password field after retry. Snapshot preview: {pass_snapshot[:500]}")
         raise Exception("Could not find password field after retry")
@@ -284,16 +959,20 @@ def perform_login() -> bool:
         run_agent_browser_command(["click", f"@{cont_ref_2}"])
     else:
         logger.info("No Continue button found for password, pressing Enter...")
-        run_agent_browser_command(["press", "Enter"])
+        run_agent_browser_command(_CMD_PRESS_ENTER)
     
-    time.sleep(25)  # Wait for heavy redirect/security check
-    
-    # STEP 6: Verify success
+    # STEP 6: Poll until the heavy redirect/security check leaves the login
+    # page (was a fixed 25s sleep), then verify.
     logger.info("Login Step 6: Verifying login success...")
-    final_snapshot = run_agent_browser_command(["snapshot"])
-    current_url = run_agent_browser_command(["get", "url"]).strip()
-    
-    if "login" in current_url.lower() or "Welcome back" in final_snapshot:
+    current_url = _wait_for_url(lambda u: "login" not in u, timeout=40)
+    # Single fused eval replaces the snapshot + get-url pair here
+    diag = _page_diagnostics()
+    welcome_back = diag.get("hasWelcome", False) if diag \
+        else "Welcome back" in run_agent_browser_command(["snapshot"])
+    if not current_url:
+        current_url = diag.get("url", "") or run_agent_browser_command(_CMD_GET_URL).strip()
+
+    if "login" in current_url.lower() or welcome_back:
         logger.error(f"Login failed - still on login page. URL: {current_url}")
         raise Exception("Login failed - still on login page")
     
@@ -307,9 +986,9 @@ def test_connectivity() -> Dict[str, Any]:
     # 1. Open example.com
     open_res = run_agent_browser_command(["open", "http://example.com"])
     
-    # 2. Take a snapshot to see if it renders
-    snapshot_res = run_agent_browser_command(["snapshot"])
-    
+    # 2. Take a snapshot to see if it renders (containment-only — stream + early exit)
+    snapshot_res = run_agent_browser_command(["snapshot"], contains="Example Domain")
+
     # 3. Check for specific text
     if "Example Domain" in snapshot_res:
         return {
@@ -328,26 +1007,31 @@ def test_clay_access() -> Dict[str, Any]:
     """Tests if we can reach Clay's login page and gathers diagnostics."""
     logger.info("Starting Clay access test with diagnostics...")
     
-    # 1. Open the login page
+    # 1. Open the login page and poll until the heavy React app renders
+    # (was a fixed 15s sleep)
     run_agent_browser_command(["open", "https://app.clay.com/login"])
-    time.sleep(15)  # Give it significantly more time to render (heavy React app)
-    
-    # 2. Check for bot detection via navigator.webdriver
-    # agent-browser eval returns the result of the JS execution
-    webdriver_res = run_agent_browser_command(["eval", "navigator.webdriver"])
-    is_automated = "true" in webdriver_res.lower()
-    
-    # 3. Take a snapshot
-    snapshot_res = run_agent_browser_command(["snapshot"])
-    
-    # 4. Take a screenshot (agent-browser saves it to a file or returns buffer info)
-    # We'll try to trigger a screenshot. If the CLI saves to a default path, we'll look for it.
-    screenshot_res = run_agent_browser_command(["screenshot", "diagnostics/clay_diag.png"])
-    
+
+    def _login_page_rendered():
+        snap = run_agent_browser_command(["snapshot"])
+        return snap if ("Clay" in snap or "Sign in" in snap) else ""
+
+    snapshot_res = wait_for(_login_page_rendered, timeout=25, interval=1.0)
+    if not snapshot_res:
+        snapshot_res = run_agent_browser_command(["snapshot"])
+
+    # 2. Gather url/title/bot-detection (fused eval) and the screenshot in
+    # one pipelined round-trip — they're independent once the page rendered
+    diag_res, screenshot_res = run_agent_browser_batch([
+        ["eval", _DIAG_JS],
+        ["screenshot", "diagnostics/clay_diag.png"],
+    ])
+    diag = _parse_diag_result(diag_res)
+
     return {
         "status": "success" if ("Clay" in snapshot_res or "Sign in" in snapshot_res) else "error",
-        "bot_detected": is_automated,
-        "webdriver_val": webdriver_res.strip(),
+        "bot_detected": bool(diag.get("webdriver")),
+        "url": diag.get("url", ""),
+        "title": diag.get("title", ""),
         "snapshot_preview": snapshot_res[:200],
         "screenshot_info": screenshot_res.strip()
     }
@@ -370,10 +1054,14 @@ def test_clay_auth() -> Dict[str, Any]:
     # 3. Try target URL after login
     logger.info("Opening target workbook URL after login...")
     run_agent_browser_command(["open", target_url])
-    time.sleep(15)
+    # Poll until the workbook URL settles (was a fixed 15s sleep)
+    current_url = _wait_for_url(
+        lambda u: "workbook" in u or "find-people" in u, timeout=25
+    )
 
     snapshot = run_agent_browser_command(["snapshot"])
-    current_url = run_agent_browser_command(["get", "url"]).strip()
+    if not current_url:
+        current_url = run_agent_browser_command(_CMD_GET_URL).strip()
 
     # 5. Final validation
     if "workbook" in current_url.lower() or "find-people" in current_url.lower():
@@ -382,35 +1070,18 @@ def test_clay_auth() -> Dict[str, Any]:
         return {"status": "error", "message": "Failed to reach target workbook", "url": current_url, "snapshot_preview": snapshot[:500]}
 
 
-def interpret_search_criteria(jobseeker: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    Uses OpenAI GPT-4o to intelligently interpret raw Airtable JobSeeker data
-    and generate optimized Clay search criteria.
-    
-    The AI considers:
-    - TargetTitles: selects 3-5 most relevant
-    - TargetGeos: simplifies if too many locations
-    - Seniority: maps to Clay dropdown values
-    - Industries: selects top 3-5
-    - ExcludeKeywords: used directly
-    
-    Returns a dict with optimized search parameters.
-    """
-    logger.info(f"Interpreting search criteria for JobSeeker: {jobseeker.get('id')}")
-    
-    # Build the prompt with all available JobSeeker data
-    prompt = f"""You are a recruiting specialist. Analyze this JobSeeker profile and generate
+_CRITERIA_PROMPT_TEMPLATE = """You are a recruiting specialist. Analyze this JobSeeker profile and generate
 optimized search criteria for Clay.com's People Search.
 
 JOB SEEKER DATA:
-- Name: {jobseeker.get('name', 'Unknown')}
-- Target Titles: {jobseeker.get('targetTitles', '')}
-- Target Geos: {jobseeker.get('targetGeos', '')}
-- Seniority: {jobseeker.get('seniority', '')}
-- Industries: {jobseeker.get('targetIndustries', '')}
-- Include Keywords: {jobseeker.get('includeKeywords', '')}
-- Exclude Keywords: {jobseeker.get('excludeKeywords', '')}
-- Notes: {jobseeker.get('notesForCoach', '')}
+- Name: {name}
+- Target Titles: {targetTitles}
+- Target Geos: {targetGeos}
+- Seniority: {seniority}
+- Industries: {targetIndustries}
+- Include Keywords: {includeKeywords}
+- Exclude Keywords: {excludeKeywords}
+- Notes: {notesForCoach}
 
 RULES:
 1. Select 3-5 most relevant job titles (avoid over-filtering)
@@ -435,9 +1106,86 @@ Return ONLY valid JSON (no markdown, no explanation):
 }}
 """
 
+# Fields that feed the criteria prompt — the cache key below covers exactly
+# these, so edits to a record in Airtable always miss and re-interpret.
+_CRITERIA_FIELDS = ("name", "targetTitles", "targetGeos", "seniority",
+                    "targetIndustries", "includeKeywords", "excludeKeywords",
+                    "notesForCoach")
+_criteria_cache: Dict[tuple, Dict[str, Any]] = {}
+_CRITERIA_CACHE_MAX = 64
+
+# Persistent layer under the in-memory cache: survives process restarts
+# (container redeploys re-process the same records). Keyed by SHA256 of the
+# canonical field JSON so the file stays readable and collision-safe.
+_CRITERIA_CACHE_FILE = os.getenv("CRITERIA_CACHE_FILE", "/tmp/ai_criteria_cache.json")
+_criteria_file_cache: Optional[Dict[str, Dict[str, Any]]] = None
+
+
+def _criteria_digest(field_values: Dict[str, str]) -> str:
+    canonical = json.dumps(field_values, sort_keys=True)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _load_criteria_cache_file() -> Dict[str, Dict[str, Any]]:
+    global _criteria_file_cache
+    if _criteria_file_cache is None:
+        try:
+            with open(_CRITERIA_CACHE_FILE) as f:
+                _criteria_file_cache = json.load(f)
+            logger.info(f"Loaded {len(_criteria_file_cache)} cached criteria from {_CRITERIA_CACHE_FILE}")
+        except (OSError, json.JSONDecodeError):
+            _criteria_file_cache = {}
+    return _criteria_file_cache
+
+
+def _store_criteria_cache_file(digest: str, criteria: Dict[str, Any]):
+    cache = _load_criteria_cache_file()
+    cache[digest] = criteria
+    try:
+        with open(_CRITERIA_CACHE_FILE, "w") as f:
+            json.dump(cache, f)
+    except OSError as e:
+        logger.warning(f"Could not persist criteria cache: {e}")
+
+
+def interpret_search_criteria(jobseeker: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Uses OpenAI GPT-4o to intelligently interpret raw Airtable JobSeeker data
+    and generate optimized Clay search criteria.
+
+    The AI considers:
+    - TargetTitles: selects 3-5 most relevant
+    - TargetGeos: simplifies if too many locations
+    - Seniority: maps to Clay dropdown values
+    - Industries: selects top 3-5
+    - ExcludeKeywords: used directly
+
+    Returns a dict with optimized search parameters. Results are cached in
+    memory per input-field combination, so re-running an unchanged record
+    skips the GPT-4o call entirely.
+    """
+    logger.info(f"Interpreting search criteria for JobSeeker: {jobseeker.get('id')}")
+
+    field_values = {k: jobseeker.get(k, "") for k in _CRITERIA_FIELDS}
+    cache_key = tuple(field_values.values())
+    cached = _criteria_cache.get(cache_key)
+    if cached is not None:
+        logger.info("Criteria cache hit — skipping GPT-4o interpretation.")
+        return dict(cached)
+
+    digest = _criteria_digest(field_values)
+    persisted = _load_criteria_cache_file().get(digest)
+    if persisted is not None:
+        logger.info("Criteria cache hit (persistent) — skipping GPT-4o interpretation.")
+        _criteria_cache[cache_key] = dict(persisted)
+        return dict(persisted)
+
+    field_values["name"] = field_values["name"] or "Unknown"
+    prompt = _CRITERIA_PROMPT_TEMPLATE.format(**field_values)
+
     try:
         response = call_with_retry(
-            openai_client.chat.completions.create,
+            _openai_client().chat.completions.create,
             model="gpt-4o",
             messages=[{"role": "user", "content": prompt}],
             response_format={"type": "json_object"}
@@ -445,15 +1193,9 @@ Return ONLY valid JSON (no markdown, no explanation):
         raw_text = response.choices[0].message.content.strip()
         
         # Clean up markdown code blocks if present
-        if raw_text.startswith("```json"):
-            raw_text = raw_text[7:]
-        if raw_text.startswith("```"):
-            raw_text = raw_text[3:]
-        if raw_text.endswith("```"):
-            raw_text = raw_text[:-3]
-        raw_text = raw_text.strip()
-        
-        criteria = json.loads(raw_text)
+        raw_text = _strip_code_fence(raw_text)
+
+        criteria = _json_loads(raw_text)
         logger.info(f"AI interpreted criteria: {json.dumps(criteria, indent=2)}")
         
         # Validate guardrails
@@ -461,7 +1203,14 @@ Return ONLY valid JSON (no markdown, no explanation):
             raise ValueError("No titles generated")
         if not criteria.get("locations"):
             raise ValueError("No locations generated")
-        
+
+        # Cache only validated AI output — fallback results are not cached so
+        # a later run gets another shot at a real interpretation
+        if len(_criteria_cache) >= _CRITERIA_CACHE_MAX:
+            _criteria_cache.clear()
+        _criteria_cache[cache_key] = dict(criteria)
+        _store_criteria_cache_file(digest, dict(criteria))
+
         return criteria
         
     except json.JSONDecodeError as e:
@@ -496,7 +1245,7 @@ def set_import_limit(limit: int = IMPORT_LIMIT) -> bool:
     run_agent_browser_command(["scroll", "down"])
     time.sleep(1)
 
-    snap = run_agent_browser_command(["snapshot", "-i"])
+    snap = run_agent_browser_command(_CMD_SNAPSHOT_I)
 
     # Expand "Limit results" section if collapsed
     snap, found = _expand_section(snap, "Limit results")
@@ -504,7 +1253,7 @@ def set_import_limit(limit: int = IMPORT_LIMIT) -> bool:
         # Try scrolling more
         run_agent_browser_command(["scroll", "down"])
         time.sleep(1)
-        snap = run_agent_browser_command(["snapshot", "-i"])
+        snap = run_agent_browser_command(_CMD_SNAPSHOT_I)
         snap, found = _expand_section(snap, "Limit results")
 
     # Find the Limit spinbutton (not "Limit per company")
@@ -615,7 +1364,7 @@ def apply_filters_deterministic(search_criteria):
     locations = search_criteria.get("locations", [])
 
     # Take initial interactive snapshot
-    snap = run_agent_browser_command(["snapshot", "-i"])
+    snap = run_agent_browser_command(_CMD_SNAPSHOT_I)
     logger.info(f"[FILTERS] Initial snapshot ({len(snap)} chars)")
 
     # --- 1. EXPAND JOB TITLE SECTION ---
@@ -626,16 +1375,15 @@ def apply_filters_deterministic(search_criteria):
     # --- 2. SENIORITY (click-based multi-select dropdown) ---
     if seniority:
         logger.info(f"[FILTERS] Applying seniority: {seniority}")
-        snap = run_agent_browser_command(["snapshot", "-i"])
+        snap = run_agent_browser_command(_CMD_SNAPSHOT_I)
 
-        sen_ref = parse_ref(snap, 'combobox "Seniority"')
-        if not sen_ref:
-            sen_ref = parse_ref(snap, 'Seniority')
+        sen_refs = parse_refs(snap, ['combobox "Seniority"', 'Seniority'])
+        sen_ref = sen_refs.get('combobox "Seniority"') or sen_refs.get('Seniority')
 
         if sen_ref:
             run_agent_browser_command(["click", f"@{sen_ref}"])
             time.sleep(1)
-            snap = run_agent_browser_command(["snapshot", "-i"])
+            snap = run_agent_browser_command(_CMD_SNAPSHOT_I)
 
             for level in seniority:
                 opt_ref = _find_ref_exact(snap, 'option', f'"{level}"')
@@ -644,13 +1392,13 @@ def apply_filters_deterministic(search_criteria):
                 if opt_ref:
                     run_agent_browser_command(["click", f"@{opt_ref}"])
                     time.sleep(0.5)
-                    snap = run_agent_browser_command(["snapshot", "-i"])
+                    snap = run_agent_browser_command(_CMD_SNAPSHOT_I)
                     logger.info(f"[FILTERS] Selected seniority: {level}")
                 else:
                     logger.warning(f"[FILTERS] Seniority option not found: {level}")
                     results["failed_filters"].append(f"seniority:{level}")
 
-            run_agent_browser_command(["press", "Escape"])
+            run_agent_browser_command(_CMD_PRESS_ESCAPE)
             time.sleep(1)
             results["seniority"] = True
             _take_filter_screenshot("filter_01_seniority", scroll_to_top=True)
@@ -664,7 +1412,7 @@ def apply_filters_deterministic(search_criteria):
     # Ref: SKILL.md pattern: "Type → Enter to add pill → repeat → ESC only after done"
     if titles:
         logger.info(f"[FILTERS] Applying job titles: {titles}")
-        snap = run_agent_browser_command(["snapshot", "-i"])
+        snap = run_agent_browser_command(_CMD_SNAPSHOT_I)
 
         titles_applied = 0
         for i, title in enumerate(titles):
@@ -685,7 +1433,7 @@ def apply_filters_deterministic(search_criteria):
                 if section_ref:
                     run_agent_browser_command(["click", f"@{section_ref}"])
                     time.sleep(1)
-                    snap = run_agent_browser_command(["snapshot", "-i"])
+                    snap = run_agent_browser_command(_CMD_SNAPSHOT_I)
                     title_ref = parse_ref(snap, 'e.g. CEO')
                     if not title_ref:
                         title_ref = _find_combobox_between(snap, "is similar to", "Job titles to exclude")
@@ -705,18 +1453,18 @@ def apply_filters_deterministic(search_criteria):
                 continue  # Try remaining titles
 
             time.sleep(1)
-            run_agent_browser_command(["press", "Enter"])
+            run_agent_browser_command(_CMD_PRESS_ENTER)
             time.sleep(1)
             # NO Escape here — keep input active for next pill
 
             # Re-snapshot — refs shift after pill creation
-            snap = run_agent_browser_command(["snapshot", "-i"])
+            snap = run_agent_browser_command(_CMD_SNAPSHOT_I)
             titles_applied += 1
             logger.info(f"[FILTERS] Added title pill {titles_applied}/{len(titles)}: {title}")
             _take_filter_screenshot(f"filter_02_title_{titles_applied}", scroll_to_top=True)
 
         # Escape ONCE after all titles are done
-        run_agent_browser_command(["press", "Escape"])
+        run_agent_browser_command(_CMD_PRESS_ESCAPE)
         time.sleep(0.5)
 
         results["titles"] = titles_applied == len(titles)
@@ -730,13 +1478,12 @@ def apply_filters_deterministic(search_criteria):
     # Same Escape fix as titles: only Escape after all exclusions are entered
     if exclusions:
         logger.info(f"[FILTERS] Applying exclusions: {exclusions}")
-        snap = run_agent_browser_command(["snapshot", "-i"])
+        snap = run_agent_browser_command(_CMD_SNAPSHOT_I)
 
         exclusions_applied = 0
         for i, keyword in enumerate(exclusions):
-            excl_ref = parse_ref(snap, 'Job titles to exclude')
-            if not excl_ref:
-                excl_ref = parse_ref(snap, 'exclude')
+            excl_refs = parse_refs(snap, ['Job titles to exclude', 'exclude'])
+            excl_ref = excl_refs.get('Job titles to exclude') or excl_refs.get('exclude')
 
             if not excl_ref:
                 logger.warning(f"[FILTERS] Exclusion input not found for '{keyword}'")
@@ -751,16 +1498,16 @@ def apply_filters_deterministic(search_criteria):
                 continue  # Try remaining exclusions
 
             time.sleep(1)
-            run_agent_browser_command(["press", "Enter"])
+            run_agent_browser_command(_CMD_PRESS_ENTER)
             time.sleep(1)
             # NO Escape between pills — keep input active
 
-            snap = run_agent_browser_command(["snapshot", "-i"])
+            snap = run_agent_browser_command(_CMD_SNAPSHOT_I)
             exclusions_applied += 1
             logger.info(f"[FILTERS] Added exclusion pill {exclusions_applied}/{len(exclusions)}: {keyword}")
 
         # Escape ONCE after all exclusions are done
-        run_agent_browser_command(["press", "Escape"])
+        run_agent_browser_command(_CMD_PRESS_ESCAPE)
         time.sleep(0.5)
 
         results["exclusions"] = exclusions_applied == len(exclusions)
@@ -788,14 +1535,14 @@ def apply_filters_deterministic(search_criteria):
         # Scroll down to reveal Location section
         run_agent_browser_command(["scroll", "down"])
         time.sleep(1)
-        snap = run_agent_browser_command(["snapshot", "-i"])
+        snap = run_agent_browser_command(_CMD_SNAPSHOT_I)
 
         # Expand Location section
         snap, expanded = _expand_section(snap, "Location")
         if not expanded:
             run_agent_browser_command(["scroll", "down"])
             time.sleep(1)
-            snap = run_agent_browser_command(["snapshot", "-i"])
+            snap = run_agent_browser_command(_CMD_SNAPSHOT_I)
             snap, expanded = _expand_section(snap, "Location")
 
         locations_applied = 0
@@ -804,7 +1551,7 @@ def apply_filters_deterministic(search_criteria):
         for country in countries:
             country_applied = False
             for attempt in range(2):  # Up to 2 attempts
-                snap = run_agent_browser_command(["snapshot", "-i"])
+                snap = run_agent_browser_command(_CMD_SNAPSHOT_I)
                 country_ref = parse_ref(snap, 'Countries to include')
 
                 if not country_ref:
@@ -830,7 +1577,7 @@ def apply_filters_deterministic(search_criteria):
                     break
 
                 time.sleep(3)  # Increased from 2s — Clay autocomplete needs time
-                snap = run_agent_browser_command(["snapshot", "-i"])
+                snap = run_agent_browser_command(_CMD_SNAPSHOT_I)
                 logger.info(f"[FILTERS] Country autocomplete snapshot (attempt {attempt+1}):\n{snap[:1500]}")
 
                 # Fuzzy option matching — try multiple strategies
@@ -873,22 +1620,22 @@ def apply_filters_deterministic(search_criteria):
                     break  # Success, exit retry loop
                 elif attempt == 0:
                     logger.info(f"[FILTERS] No autocomplete options for '{country}', retrying...")
-                    run_agent_browser_command(["press", "Escape"])
+                    run_agent_browser_command(_CMD_PRESS_ESCAPE)
                     time.sleep(1)
                     continue
                 else:
                     # Don't count Enter fallback as success — unreliable for countries
                     logger.warning(f"[FILTERS] Country '{country}' autocomplete failed after 2 attempts")
-                    run_agent_browser_command(["press", "Escape"])
+                    run_agent_browser_command(_CMD_PRESS_ESCAPE)
                     results["failed_filters"].append(f"country_autocomplete:{country}")
 
             if country_applied:
-                run_agent_browser_command(["press", "Escape"])
+                run_agent_browser_command(_CMD_PRESS_ESCAPE)
                 time.sleep(0.5)
 
         # --- 5b. Cities ---
         for city in cities:
-            snap = run_agent_browser_command(["snapshot", "-i"])
+            snap = run_agent_browser_command(_CMD_SNAPSHOT_I)
             city_ref = parse_ref(snap, 'Cities to include')
 
             if not city_ref:
@@ -903,13 +1650,12 @@ def apply_filters_deterministic(search_criteria):
                 continue
 
             time.sleep(3)  # Increased from 2s for autocomplete
-            snap = run_agent_browser_command(["snapshot", "-i"])
+            snap = run_agent_browser_command(_CMD_SNAPSHOT_I)
 
             opt_ref = _find_ref_exact(snap, 'option', f'"{city}"')
             if not opt_ref:
-                opt_ref = parse_ref(snap, f'option "{city}')
-            if not opt_ref:
-                opt_ref = parse_ref(snap, city)
+                city_refs = parse_refs(snap, [f'option "{city}', city])
+                opt_ref = city_refs.get(f'option "{city}') or city_refs.get(city)
 
             if opt_ref:
                 run_agent_browser_command(["click", f"@{opt_ref}"])
@@ -917,12 +1663,12 @@ def apply_filters_deterministic(search_criteria):
                 locations_applied += 1
                 logger.info(f"[FILTERS] Selected city: {city}")
             else:
-                run_agent_browser_command(["press", "Enter"])
+                run_agent_browser_command(_CMD_PRESS_ENTER)
                 time.sleep(1)
                 locations_applied += 1
                 logger.info(f"[FILTERS] Entered city (free-text): {city}")
 
-            run_agent_browser_command(["press", "Escape"])
+            run_agent_browser_command(_CMD_PRESS_ESCAPE)
             time.sleep(0.5)
 
         results["locations"] = locations_applied > 0
@@ -962,7 +1708,7 @@ def wait_for_add_button_enabled(max_wait=90, poll_interval=5):
     elapsed = 0
     last_snap = ""
     while elapsed < max_wait:
-        snap = run_agent_browser_command(["snapshot", "-i"])
+        snap = run_agent_browser_command(_CMD_SNAPSHOT_I)
         last_snap = snap
 
         # Look for "Add to table" button ref (existing table with records)
@@ -1047,7 +1793,7 @@ def click_add_to_table_deterministic(record_id=None):
     if res and "Error" in res:
         # Button ref may have shifted — re-snapshot and try once more
         logger.warning(f"[IMPORT] Click failed: {res}. Re-snapshotting...")
-        snap = run_agent_browser_command(["snapshot", "-i"])
+        snap = run_agent_browser_command(_CMD_SNAPSHOT_I)
         search_text = button_text.lower()
         for line in snap.split('\n'):
             if search_text in line.lower() and '[ref=' in line and '[disabled]' not in line.lower():
@@ -1063,7 +1809,7 @@ def click_add_to_table_deterministic(record_id=None):
     if button_text == "Continue":
         logger.info("[IMPORT] 'Continue' clicked, now looking for 'Add as new rows' option...")
         time.sleep(2)  # Wait for dropdown to appear
-        snap = run_agent_browser_command(["snapshot", "-i"])
+        snap = run_agent_browser_command(_CMD_SNAPSHOT_I)
 
         add_rows_ref = None
         for line in snap.split('\n'):
@@ -1093,7 +1839,7 @@ def click_add_to_table_deterministic(record_id=None):
                         break
 
     # Step 5: Handle confirmation dialog (if any)
-    snap = run_agent_browser_command(["snapshot", "-i"])
+    snap = run_agent_browser_command(_CMD_SNAPSHOT_I)
     for keyword in ['confirm', 'import', 'yes']:
         confirm_ref = None
         for line in snap.split('\n'):
@@ -1113,7 +1859,7 @@ def click_add_to_table_deterministic(record_id=None):
     logger.info("[IMPORT] Waiting for page transition after click...")
     for wait_round in range(12):  # Up to 60 seconds
         time.sleep(5)
-        current_url = run_agent_browser_command(["get", "url"]).strip()
+        current_url = run_agent_browser_command(_CMD_GET_URL).strip()
         logger.info(f"[IMPORT] Page check {wait_round+1}/12: {current_url}")
 
         if "find-people" not in current_url.lower():
@@ -1146,7 +1892,7 @@ def click_add_to_table_deterministic(record_id=None):
 
     # Page didn't transition — check if button is gone (import may have happened inline)
     logger.warning("[IMPORT] Page didn't transition after 60s. Checking page state...")
-    snap = run_agent_browser_command(["snapshot", "-i"])
+    snap = run_agent_browser_command(_CMD_SNAPSHOT_I)
     if "add to table" not in snap.lower():
         logger.info("[IMPORT] 'Add to table' button gone — import may have triggered inline")
         import_result = wait_for_import_completion(expected_count)
@@ -1584,7 +2330,7 @@ def update_record_id_column(record_id: str) -> Dict[str, Any]:
         logger.info(f"{LOG} Step 3: Finding text input in edit panel...")
 
         # Try both snapshot modes - interactive and regular may show elements differently
-        snap_i = run_agent_browser_command(["snapshot", "-i"]) or ""
+        snap_i = run_agent_browser_command(_CMD_SNAPSHOT_I) or ""
         snap_r = run_agent_browser_command(["snapshot"]) or ""
 
         # Log full interactive snapshot for debugging
@@ -1788,9 +2534,9 @@ def update_record_id_column(record_id: str) -> Dict[str, Any]:
         if not save_clicked:
             # Last resort: press Escape and hope the value was auto-saved
             logger.warning(f"{LOG} Could not find Save button, pressing Escape as fallback")
-            run_agent_browser_command(["press", "Escape"])
+            run_agent_browser_command(_CMD_PRESS_ESCAPE)
             time.sleep(1)
-            run_agent_browser_command(["press", "Escape"])
+            run_agent_browser_command(_CMD_PRESS_ESCAPE)
             time.sleep(1)
 
         time.sleep(2)
@@ -1823,9 +2569,9 @@ def trigger_enrichment(expected_count=None, import_result=None) -> Dict[str, Any
     try:
         # Cleanup: dismiss any open panels/dropdowns from prior steps (e.g., RecordID edit panel)
         logger.info("[ENRICHMENT] Cleanup: pressing Escape to dismiss any open panels...")
-        run_agent_browser_command(["press", "Escape"])
+        run_agent_browser_command(_CMD_PRESS_ESCAPE)
         time.sleep(1)
-        run_agent_browser_command(["press", "Escape"])
+        run_agent_browser_command(_CMD_PRESS_ESCAPE)
         time.sleep(1)
 
         # ================================================================
@@ -1967,9 +2713,243 @@ def trigger_enrichment(expected_count=None, import_result=None) -> Dict[str, Any
         logger.error(f"[ENRICHMENT] Exception during enrichment trigger: {e}")
         return {"count": 0, "started": False, "error": str(e)}
 
-def run_automation_for_jobseeker(jobseeker: Dict[str, Any]):
+# --- Agent action handlers ---
+# Each takes the decoded action dict and returns (error, pending_snapshot):
+# error is None on success; pending_snapshot, when set, is a fresh post-action
+# snapshot the turn loop should reuse instead of re-snapshotting. Dispatch via
+# _ACTION_HANDLERS — done/fail/snapshot/click_by_text stay inline in the loop
+# because they terminate the run or touch loop-local state.
+
+
+def _handle_click(action):
+    eid = action.get("element_id")
+    # Clicks can fail transiently while React swaps nodes out mid-render;
+    # retry briefly with jittered backoff before surfacing the error
+    res = backoff_call(
+        lambda: run_agent_browser_command(["click", eid]),
+        lambda r: r.ok,
+    )
+    if not res.ok:
+        logger.warning(f"Click failed: {res}")
+        return res, None
+    wait_for_dom_change(timeout=2)  # Wait for UI reaction, return early once it happens
+    return None, None
+
+
+def _handle_fill(action):
+    eid = action.get("element_id")
+    val = action.get("value")
+    res = backoff_call(
+        lambda: run_agent_browser_command(["fill", eid, val]),
+        lambda r: r.ok,
+    )
+    if not res.ok:
+        logger.warning(f"Fill failed: {res}")
+        return res, None
+    # Often need to press enter for pills, but ONLY if fill succeeded.
+    # Both presses are pipelined into one session round-trip.
+    run_agent_browser_batch([_CMD_PRESS_ENTER, _CMD_PRESS_ENTER])
+    wait_for_dom_change(timeout=1)
+    return None, None
+
+
+def _handle_wait(action):
+    wait_secs = min(action.get("seconds", 5), 15)  # Cap at 15 seconds
+    logger.info(f"Agent waiting {wait_secs}s: {action.get('reason', 'no reason')}")
+    time.sleep(wait_secs)
+    return None, None
+
+
+def _handle_press(action):
+    key = action.get("key", "Enter")
+    res = run_agent_browser_command(["press", key])
+    if not res.ok:
+        logger.warning(f"Press failed: {res}")
+        return res, None
+    wait_for_dom_change(timeout=1)
+    return None, None
+
+
+def _fill_focused_input(label: str, val: str, kind: str):
+    """Shared body of fill_placeholder/fill_label: focus by text, fill, Enter.
+
+    Fast path is one fused eval — focus + insertText (React-safe) + Enter
+    keydown in a single round-trip instead of three. Any eval hiccup falls
+    back to the original step-wise focus/fill/press sequence."""
+    if label.lower() not in _focus_miss_cache:
+        res = run_agent_browser_command(
+            ["eval", _FILL_BY_TEXT_JS % (json.dumps(label), json.dumps(val))])
+        if "Filled" in res:
+            time.sleep(1)
+            return None, None
+        if "Element not found" in res:
+            _focus_miss_cache.add(label.lower())
+            error = f"{kind} '{label}' not found"
+            logger.warning(error)
+            return error, None
+        logger.warning(f"Fused fill-{kind} eval failed ({res}); using step-wise path")
+    focus_res = focus_input_by_text(label)
+    if "Element not found" in focus_res:
+        error = f"{kind} '{label}' not found"
+        logger.warning(error)
+        return error, None
+    time.sleep(0.3)
+    res = run_agent_browser_command(["fill", ":focus", val])
+    if not res.ok:
+        logger.warning(f"Fill-{kind} failed: {res}")
+        return res, None
+    run_agent_browser_command(_CMD_PRESS_ENTER)
+    time.sleep(1)
+    return None, None
+
+
+def _handle_fill_placeholder(action):
+    return _fill_focused_input(action.get("placeholder"), action.get("value"), "Placeholder")
+
+
+def _handle_fill_label(action):
+    return _fill_focused_input(action.get("label"), action.get("value"), "Label")
+
+
+def _handle_focus_placeholder(action):
+    # Focus an element by placeholder/aria-label without typing
+    ph = action.get("placeholder")
+    res = focus_input_by_text(ph)
+    if "Element not found" in res:
+        error = f"Placeholder '{ph}' not found via JS"
+        logger.warning(error)
+        return error, None
+    logger.info(f"JS Focus result: {res}")
+    time.sleep(0.5)
+    return None, None
+
+
+def _handle_type_and_enter(action):
+    # Type text into a multi-select input then press Enter to create a pill.
+    # Uses snapshot -i to find the target input ref instead of broken `fill :focus`.
+    val = action.get("value")
+    ph = action.get("placeholder", "")
+
+    # Split comma-separated values, unless any item is short enough to
+    # be a "City, ST"-style suffix (single regex scan instead of
+    # split + strip + all() passes over the string)
+    if "," in val and not _SHORT_ITEM_RE.search(val):
+        parts = [v.strip() for v in val.split(",") if v.strip()]
+        values = parts if len(parts) > 1 else [val]
+    else:
+        values = [val]
+    logger.info("type_and_enter: %d value(s) to enter", len(values))
+
+    snap = run_agent_browser_command(_CMD_SNAPSHOT_I)
+    snap_fresh = True
+    for i, single_val in enumerate(values):
+        # Fast path for follow-up pills: after Enter, Clay keeps the same
+        # input focused, so try filling :focus directly and only fall back
+        # to the full snapshot ref search if that errors. Saves the Escape +
+        # re-snapshot round-trips per additional pill.
+        if i > 0:
+            res = run_agent_browser_command(["fill", ":focus", single_val])
+            if res.ok:
+                time.sleep(1)
+                run_agent_browser_command(_CMD_PRESS_ENTER)
+                time.sleep(1)
+                snap_fresh = False
+                logger.info("Pill %d/%d entered via :focus fast path: %r", i + 1, len(values), single_val)
+                continue
+            logger.warning("fill :focus failed for %r (%s); using snapshot search", single_val, res)
+            if not snap_fresh:
+                snap = run_agent_browser_command(_CMD_SNAPSHOT_I)
+                snap_fresh = True
+
+        # Find the target input via snapshot -i
+        input_ref = None
+
+        # Strategy 1: find expanded combobox (indicates active input)
+        for line in snap.split('\n'):
+            if ('combobox' in line.lower() or 'textbox' in line.lower()) and '[ref=' in line:
+                if '[expanded]' in line:
+                    parts = line.split('[ref=')
+                    if len(parts) > 1:
+                        input_ref = parts[1].split(']')[0]
+                        break
+
+        # Strategy 2: use placeholder text from action
+        if not input_ref and ph:
+            input_ref = parse_ref(snap, ph)
+
+        # Strategy 3: find unlabeled combobox not matching known sections
+        if not input_ref:
+            for line in snap.split('\n'):
+                if 'combobox' in line.lower() and '[ref=' in line:
+                    if not any(kw in line.lower() for kw in ['seniority', 'function', 'cities', 'countries', 'regions', 'states']):
+                        parts = line.split('[ref=')
+                        if len(parts) > 1:
+                            input_ref = parts[1].split(']')[0]
+                            break
+
+        if input_ref:
+            res = run_agent_browser_command(["fill", f"@{input_ref}", single_val])
+            if not res.ok:
+                logger.warning(f"Type (Fill) failed for '{single_val}': {res}")
+                return res, None
+            time.sleep(1)
+            run_agent_browser_command(_CMD_PRESS_ENTER)
+            time.sleep(1)
+            run_agent_browser_command(_CMD_PRESS_ESCAPE)
+            time.sleep(0.5)
+            snap = run_agent_browser_command(_CMD_SNAPSHOT_I)
+            snap_fresh = True
+            logger.info("Pill %d/%d entered: %r", i + 1, len(values), single_val)
+        else:
+            # Fallback: JS execCommand on active element
+            safe_val = single_val.replace("'", "\\'")
+            run_agent_browser_command(["eval",
+                f"document.activeElement && document.execCommand('insertText', false, '{safe_val}')"])
+            time.sleep(0.5)
+            run_agent_browser_command(_CMD_PRESS_ENTER)
+            time.sleep(1)
+            snap = run_agent_browser_command(_CMD_SNAPSHOT_I)
+            snap_fresh = True
+            logger.info("Pill %d/%d entered via JS fallback: %r", i + 1, len(values), single_val)
+
+    # Next turn reuses the final snapshot; take one if the last pill went
+    # through the fast path (which skips the per-pill re-snapshot)
+    if not snap_fresh:
+        snap = run_agent_browser_command(_CMD_SNAPSHOT_I)
+    return None, snap
+
+
+def _handle_scroll(action):
+    direction = action.get("direction", "down")
+    pixels = action.get("pixels", 500)
+    delta = pixels if direction == "down" else -pixels
+    # Try scrolling the filter panel first, fall back to window scroll
+    res = run_agent_browser_command(["eval", _SCROLL_JS % (delta, delta)])
+    logger.info(f"Scroll result: {res}")
+    time.sleep(1)
+    return None, None
+
+
+_ACTION_HANDLERS = {
+    "click": _handle_click,
+    "fill": _handle_fill,
+    "wait": _handle_wait,
+    "press": _handle_press,
+    "fill_placeholder": _handle_fill_placeholder,
+    "fill_label": _handle_fill_label,
+    "focus_placeholder": _handle_focus_placeholder,
+    "type_and_enter": _handle_type_and_enter,
+    "scroll": _handle_scroll,
+}
+
+
+def run_automation_for_jobseeker(jobseeker: Dict[str, Any], search_criteria: Optional[Dict[str, Any]] = None):
     """
     Main agent loop for a single job seeker.
+
+    search_criteria: optional pre-computed result of interpret_search_criteria().
+    Batch callers prefetch these in parallel so the GPT-4o interpretation for
+    jobseeker N+1 overlaps with the browser work for jobseeker N.
     """
     logger.info(f"Starting automation for JobSeeker: {jobseeker.get('id')}")
     debug_state.reset_run(
@@ -1981,29 +2961,47 @@ def run_automation_for_jobseeker(jobseeker: Dict[str, Any]):
     # 1. Initialize Browser & Session
     CLAY_URL = "https://app.clay.com/workspaces/579795/w/find-people?destinationTableId=t_0t6pb5u5rFNYudNfngq&workbookId=wb_0t6pb5rpbgD8nRCHvYh"
     
-    # Sequence: 
+    # Sequence:
     logger.info(f"Preparing workspace for {jobseeker.get('id')}...")
-    # Force close any existing daemon to ensure a clean browser state
-    run_agent_browser_command(["close"]) 
-    time.sleep(5) # Increase wait for cleanup
-    
+    # Reuse a warm daemon when one exists: opening the URL resets page state,
+    # and the login check below catches an expired session. A cold restart
+    # (close + respawn + Chromium boot) cost ~15s per jobseeker and is only
+    # needed when the daemon is actually wedged — the recycle logic in the
+    # turn loop still handles that case.
+
     logger.info("Opening target URL to establish domain context...")
     run_agent_browser_command(["open", CLAY_URL])
-    time.sleep(10)
-    
+    # Poll until the app renders enough to tell login state (was a 10s sleep)
+    snapshot = _wait_for_clay_context(timeout=20)
+
     # Check if login is needed
-    snapshot = run_agent_browser_command(["snapshot"])
-    if "Log in" in snapshot or "Sign in" in snapshot or "login" in snapshot.lower():
+    if _LOGIN_MARKER_RE.search(snapshot):
         logger.info("Login required. Launching deterministic login...")
         perform_login()
         # After login, re-open the target URL to ensure we are on the workbook
         logger.info("Re-opening target workbook URL after login...")
         run_agent_browser_command(["open", CLAY_URL])
-        time.sleep(10)
+        _wait_for_clay_context(timeout=20)
     
     # 2. AI Interpretation of Search Criteria (Phase 3 addition)
-    logger.info("Interpreting search criteria via OpenAI GPT-4o...")
-    search_criteria = interpret_search_criteria(jobseeker)
+    if search_criteria is None and jobseeker.get("ai_titles") and jobseeker.get("ai_locations"):
+        # Upstream pipelines can hand us already-structured ai_* criteria on
+        # the record itself — no need to pay a GPT-4o round-trip to rebuild them
+        logger.info("Jobseeker carries structured ai_* criteria — skipping interpretation.")
+        search_criteria = {
+            "titles": jobseeker["ai_titles"],
+            "locations": jobseeker["ai_locations"],
+            "seniority": jobseeker.get("ai_seniority", []),
+            "industries": jobseeker.get("ai_industries", []),
+            "excludeKeywords": jobseeker.get("ai_excludeKeywords", []),
+            "confidence": jobseeker.get("ai_confidence", "precomputed"),
+            "reasoning": jobseeker.get("ai_reasoning", "Structured criteria supplied on the record"),
+        }
+    if search_criteria is None:
+        logger.info("Interpreting search criteria via OpenAI GPT-4o...")
+        search_criteria = interpret_search_criteria(jobseeker)
+    else:
+        logger.info("Using pre-computed search criteria (prefetched by caller).")
     logger.info(f"AI-interpreted search criteria: {json.dumps(search_criteria, indent=2)}")
     
     # Merge AI criteria with jobseeker context for directive
@@ -2033,8 +3031,10 @@ def run_automation_for_jobseeker(jobseeker: Dict[str, Any]):
     # 3. Initialize chat history for OpenAI
     # Directive goes in system message (sent once). Snapshots go in user messages per turn.
     # Windowed: keep system message + last N turn pairs to prevent context overflow.
-    CHAT_WINDOW_SIZE = 6  # Keep last 6 turn pairs — GPT-4o only verifies + clicks Add to table
-    system_message = {"role": "system", "content": directive_text}
+    # Keep last N turn pairs — the model only verifies + clicks Add to table,
+    # so a short window suffices; env-tunable for debugging longer contexts.
+    CHAT_WINDOW_SIZE = int(os.getenv("CHAT_WINDOW_SIZE", "6"))
+    system_message = {"role": "system", "content": directive_text + "\n" + _TURN_INSTRUCTIONS}
     chat_messages = []
 
     # 3b. Apply ALL filters deterministically BEFORE the GPT-4o loop
@@ -2095,6 +3095,15 @@ If a critical filter is visibly MISSING, report with {{"type": "fail", "reason":
     last_error = None
     last_action_key = None
     repeat_count = 0
+    last_snapshot_hash = None  # Detect unchanged pages to skip re-sending the snapshot
+    pending_snapshot = None  # Snapshot taken at the end of an action, reused next turn
+    directive_hash = hashlib.sha256(directive_text.encode()).hexdigest()
+    # Route all turns for one jobseeker to the same cache shard so the long,
+    # byte-identical system prefix (directive + instructions) hits OpenAI's
+    # prompt cache from turn 2 onward.
+    prompt_cache_key = f"js-{jobseeker.get('id', 'unknown')}"
+    turn_model = TURN_MODEL
+    invalid_json_turns = 0  # Escalate to the fallback model if the mini model misbehaves
     while turn < MAX_TURNS:
         turn += 1
         log_resource_diagnostics(turn)
@@ -2109,56 +3118,71 @@ If a critical filter is visibly MISSING, report with {{"type": "fail", "reason":
             time.sleep(5)
             # Use deterministic login instead of cookie injection (cookies expire too quickly)
             run_agent_browser_command(["open", CLAY_URL])
-            time.sleep(10)
+            snapshot = _wait_for_clay_context(timeout=20)
             # Check if login is needed post-recycling
-            snapshot = run_agent_browser_command(["snapshot"])
-            if "Log in" in snapshot or "Sign in" in snapshot or "login" in snapshot.lower():
+            if _LOGIN_MARKER_RE.search(snapshot):
                 logger.info("Post-recycling login required. Logging in...")
                 perform_login()
                 run_agent_browser_command(["open", CLAY_URL])
-                time.sleep(10)
+                _wait_for_clay_context(timeout=20)
             logger.info("Browser recycled successfully.")
             # Reset chat history after recycling — the browser state is fresh,
             # so old context about previous actions is misleading.
             chat_messages = []
+            last_snapshot_hash = None
+            pending_snapshot = None
             logger.info("Chat history cleared after browser recycling.")
 
-        
+
         # Observe
         # Use -i for interactive elements only — compact, shows all filter inputs/pills/buttons
-        snapshot_json = run_agent_browser_command(["snapshot", "-i"])
+        # Reuse the snapshot taken at the end of the previous action when one
+        # exists (act+observe fused into one round-trip), else take a fresh one.
+        # Snapshot + debug screenshot + URL guard are pipelined into a single
+        # stdio round-trip instead of three sequential ones.
+        _debug_ss_path = debug_state.screenshot_path(turn)
+        if pending_snapshot:
+            snapshot_json = pending_snapshot
+            pending_snapshot = None
+            logger.info("Reusing post-action snapshot from previous turn.")
+            _ss_res, current_url = run_agent_browser_batch([
+                ["screenshot", _debug_ss_path],
+                _CMD_GET_URL,
+            ])
+        else:
+            snapshot_json, _ss_res, current_url = run_agent_browser_batch([
+                _CMD_SNAPSHOT_I,
+                ["screenshot", _debug_ss_path],
+                _CMD_GET_URL,
+            ])
+        _debug_ss_ok = "Error" not in _ss_res
+        current_url = current_url.strip()
         
         # Check for hard failure in snapshot to avoid infinite loop
         if snapshot_json.startswith("Error:"):
              logger.error(f"Snapshot failed: {snapshot_json}")
              raise Exception(f"Browser Snapshot Failed: {snapshot_json}")
 
-        # Smart truncation: keep first half + last half to preserve both top nav AND bottom buttons
+        # Smart truncation: prune non-interactive lines first, then keep first
+        # half + last half to preserve both top nav AND bottom buttons
         # Increased to 20000 to ensure filter sections (job titles, locations) are NOT truncated
         MAX_SNAPSHOT_CHARS = 20000
+        if len(snapshot_json) > MAX_SNAPSHOT_CHARS:
+            snapshot_json = _prune_snapshot_for_prompt(snapshot_json)
         if len(snapshot_json) > MAX_SNAPSHOT_CHARS:
             half = MAX_SNAPSHOT_CHARS // 2
             logger.info(f"Snapshot truncated: {len(snapshot_json)} -> {MAX_SNAPSHOT_CHARS} chars (first {half} + last {half})")
             snapshot_json = snapshot_json[:half] + "\n\n... [MIDDLE TRUNCATED] ...\n\n" + snapshot_json[-half:]
-        
-        # Debug: capture screenshot for this turn
-        _debug_ss_path = debug_state.screenshot_path(turn)
-        _debug_ss_ok = False
-        try:
-            _ss_res = run_agent_browser_command(["screenshot", _debug_ss_path])
-            _debug_ss_ok = "Error" not in _ss_res
-        except Exception:
-            pass  # Never break automation for a debug screenshot
 
         # PAGE-STATE GUARD: ensure we're still on the find-people page
-        current_url = run_agent_browser_command(["get", "url"]).strip()
+        # (URL was fetched in the observe batch above)
         if "find-people" not in current_url.lower():
             if "login" in current_url.lower():
                 logger.warning(f"[GUARD] Redirected to login page. Re-authenticating...")
                 debug_state.record_turn(turn, snapshot_json[:500], {"type": "guard-relogin"}, "relogin", None, _debug_ss_ok)
                 perform_login()
                 run_agent_browser_command(["open", CLAY_URL])
-                time.sleep(10)
+                _wait_for_clay_context(timeout=20)
                 continue
             elif any(kw in current_url.lower() for kw in ["workbook", "table"]):
                 logger.info(f"[GUARD] Page transitioned to table view: {current_url}")
@@ -2198,65 +3222,138 @@ If a critical filter is visibly MISSING, report with {{"type": "fail", "reason":
 You MUST click "Add to table" NOW. Look for the button in the snapshot and click it immediately.
 """
 
-        # Think — directive is in system message, only send snapshot + instructions per turn
+        # Snapshot dedup: when the page is byte-identical to the previous turn
+        # (common after waits or no-op clicks), send a short marker instead of
+        # re-uploading the full snapshot — refs are stable across identical
+        # snapshots, so the model can keep acting on the one it already has.
+        snapshot_hash = hashlib.sha256(snapshot_json.encode()).hexdigest()
+        if snapshot_hash == last_snapshot_hash:
+            snapshot_for_prompt = (
+                "PAGE UNCHANGED — identical to the snapshot from your previous turn. "
+                "All element refs from that snapshot are still valid."
+            )
+            logger.info("Snapshot unchanged since last turn — sending marker instead of full snapshot")
+        else:
+            snapshot_for_prompt = snapshot_json
+            _focus_miss_cache.clear()  # New page state — stale misses no longer apply
+        last_snapshot_hash = snapshot_hash
+
+        # Think — directive + static instructions are in the system message;
+        # only hints + the snapshot vary per turn
         prompt = f"""{error_context}{loop_hint}{completion_hint}
 {filter_reminder}
 
 CURRENT PAGE STATE (Interactive Elements):
-{snapshot_json}
-
-INSTRUCTIONS:
-Filters have been applied programmatically. Your job is to verify and click "Add to table".
-Look for "Clear chip" buttons (indicate pills), "X filters" labels, and the "Add to table" button.
-IMPORTANT: If "Add to table" button is disabled or shows a loading indicator, use "wait" to wait for it to become enabled. Do NOT signal fail for a loading button.
-Return ONLY a JSON object with one of these structures:
-{{"type": "click", "element_id": "@eX", "reason": "why"}}
-{{"type": "wait", "seconds": 5, "reason": "Waiting for Add to table button to become enabled"}}
-{{"type": "press", "key": "Enter", "reason": "Use for Enter, Escape, or other keys"}}
-{{"type": "scroll", "direction": "down", "pixels": 300, "reason": "Scroll to reveal hidden sections"}}
-{{"type": "done", "reason": "why"}}
-{{"type": "fail", "reason": "why"}}
+{snapshot_for_prompt}
 """
-        try:
-            chat_messages.append({"role": "user", "content": prompt})
-
-            # Chat history windowing: keep only last N turn pairs to prevent context overflow
-            max_messages = CHAT_WINDOW_SIZE * 2  # Each turn = 1 user + 1 assistant message
-            if len(chat_messages) > max_messages:
-                chat_messages = chat_messages[-max_messages:]
-                logger.info(f"Chat history trimmed to last {CHAT_WINDOW_SIZE} turns ({len(chat_messages)} messages)")
-
-            # Prepend system message (directive) — always present, not counted in window
-            messages_to_send = [system_message] + chat_messages
-
-            response = call_with_retry(
-                openai_client.chat.completions.create,
-                model="gpt-4o",
-                messages=messages_to_send,
-                response_format={"type": "json_object"}
-            )
-            raw_text = response.choices[0].message.content.strip()
-            chat_messages.append({"role": "assistant", "content": raw_text})
-        except Exception as e:
-            # Log detailed error info for OpenAI BadRequestError (likely context overflow)
-            total_chars = sum(len(m.get("content", "")) for m in messages_to_send)
-            logger.error(f"AI decision failed after retries: {e}")
-            logger.error(f"Message stats: {len(messages_to_send)} messages, ~{total_chars} total chars, snapshot: {len(snapshot_json)} chars")
-            raise
+        # Action-cache lookup: replay a previously successful decision for this
+        # exact (directive, page-state) pair without calling the model. Skipped
+        # once loop detection trips so the model can break the cycle itself.
+        cache_key = f"{directive_hash}:{snapshot_hash}"
+        raw_text = None
+        cached_action = _action_cache.get(cache_key)
+        if cached_action and repeat_count < 3:
+            cache_valid = True
+            try:
+                eid = _json_loads(cached_action).get("element_id")
+                # The target ref must still exist on the live page
+                if eid and eid.lstrip("@") not in snapshot_json:
+                    cache_valid = False
+            except json.JSONDecodeError:
+                cache_valid = False
+            if cache_valid:
+                raw_text = cached_action
+                logger.info(f"[ACTION-CACHE] Hit for page state {snapshot_hash[:12]} — skipping GPT-4o call")
+                # Keep chat history coherent for later cache misses
+                chat_messages.append({"role": "user", "content": prompt})
+                chat_messages.append({"role": "assistant", "content": raw_text})
+            else:
+                _action_cache.pop(cache_key, None)
+
+        if raw_text is not None:
+            pass  # Cached decision — no API call this turn
+        else:
+            try:
+                # Old snapshots are stale the moment a new one exists; collapse
+                # the snapshot section of earlier user messages to a short
+                # marker so the chat window doesn't re-upload ~8KB per turn.
+                # (Done once per message — the marker itself stays stable, so
+                # the prompt-cache prefix is unaffected on later turns.)
+                for msg in chat_messages:
+                    if (msg["role"] == "user"
+                            and "CURRENT PAGE STATE" in msg["content"]
+                            and "[snapshot omitted" not in msg["content"]):
+                        head, _, _ = msg["content"].partition("CURRENT PAGE STATE")
+                        msg["content"] = head + "CURRENT PAGE STATE: [snapshot omitted — superseded by a later turn]"
+                chat_messages.append({"role": "user", "content": prompt})
+
+                # Chat history windowing: keep only last N turn pairs to prevent context overflow
+                max_messages = CHAT_WINDOW_SIZE * 2  # Each turn = 1 user + 1 assistant message
+                if len(chat_messages) > max_messages:
+                    chat_messages = chat_messages[-max_messages:]
+                    logger.info(f"Chat history trimmed to last {CHAT_WINDOW_SIZE} turns ({len(chat_messages)} messages)")
+
+                # Prepend system message (directive) — always present, not counted in window
+                messages_to_send = [system_message] + chat_messages
+
+                response = call_with_retry(
+                    _openai_client().chat.completions.create,
+                    model=turn_model,
+                    messages=messages_to_send,
+                    response_format={"type": "json_object"},
+                    max_tokens=TURN_MAX_TOKENS,
+                    temperature=0,
+                    extra_body={"prompt_cache_key": prompt_cache_key}
+                )
+                raw_text = response.choices[0].message.content.strip()
+                chat_messages.append({"role": "assistant", "content": raw_text})
+            except Exception as e:
+                # Log detailed error info for OpenAI BadRequestError (likely context overflow)
+                total_chars = sum(len(m.get("content", "")) for m in messages_to_send)
+                logger.error(f"AI decision failed after retries: {e}")
+                logger.error(f"Message stats: {len(messages_to_send)} messages, ~{total_chars} total chars, snapshot: {len(snapshot_json)} chars")
+                raise
         
         # Clean up markdown code blocks if present
-        if raw_text.startswith("```json"):
-            raw_text = raw_text[7:-3].strip()
-        elif raw_text.startswith("```"):
-            raw_text = raw_text[3:-3].strip()
-            
+        raw_text = _strip_code_fence(raw_text)
+
         logger.info(f"Agent Decision: {raw_text}")
         
-        try:
-            action = json.loads(raw_text)
-        except json.JSONDecodeError:
-            logger.error("Failed to parse agent JSON. Retrying...")
+        # Parse the decision, with up to 2 cheap repair round-trips: a repair
+        # reuses the existing chat (no new snapshot, no new turn) and just asks
+        # the model to re-emit valid JSON, instead of burning a full turn.
+        action = None
+        for repair_attempt in range(3):
+            try:
+                action = _json_loads(raw_text)
+                break
+            except json.JSONDecodeError:
+                if repair_attempt == 2:
+                    break
+                logger.warning(f"Invalid agent JSON, requesting repair (attempt {repair_attempt + 1}/2)...")
+                chat_messages.append({
+                    "role": "user",
+                    "content": "Your previous reply was not valid JSON. Re-send ONLY the JSON object, nothing else."
+                })
+                response = call_with_retry(
+                    _openai_client().chat.completions.create,
+                    model=turn_model,
+                    messages=[system_message] + chat_messages,
+                    response_format={"type": "json_object"},
+                    max_tokens=TURN_MAX_TOKENS,
+                    temperature=0,
+                    extra_body={"prompt_cache_key": prompt_cache_key}
+                )
+                raw_text = response.choices[0].message.content.strip()
+                chat_messages.append({"role": "assistant", "content": raw_text})
+                raw_text = _strip_code_fence(raw_text)
+        if action is None:
+            logger.error("Failed to parse agent JSON after repair attempts. Retrying turn...")
             last_error = f"Invalid JSON returned: {raw_text[:100]}"
+            invalid_json_turns += 1
+            if invalid_json_turns >= 2 and turn_model != TURN_MODEL_FALLBACK:
+                logger.warning(f"Escalating turn model {turn_model} -> {TURN_MODEL_FALLBACK} after repeated invalid JSON")
+                turn_model = TURN_MODEL_FALLBACK
             continue
             
         # Act
@@ -2271,14 +3368,21 @@ Return ONLY a JSON object with one of these structures:
             repeat_count = 1
             last_action_key = action_key
 
-        if action_type == "snapshot":
+        handler = _ACTION_HANDLERS.get(action_type)
+        if handler is not None:
+            handler_error, handler_snapshot = handler(action)
+            last_error = handler_error
+            if handler_snapshot:
+                pending_snapshot = handler_snapshot
+
+        elif action_type == "snapshot":
              logger.info("Agent requested explicit snapshot.")
              continue # Loop will take a new snapshot at start of next turn
 
         elif action_type == "done":
             logger.info(f"Agent signaled completion. Reason: {action.get('reason')}")
             # Verify completion: check page state after filters + "Add to table" click
-            verify_url = run_agent_browser_command(["get", "url"]).strip()
+            verify_url = run_agent_browser_command(_CMD_GET_URL).strip()
             logger.info(f"Completion check URL: {verify_url}")
             # Reject: still on login page
             if "login" in verify_url.lower():
@@ -2377,7 +3481,7 @@ Return ONLY a JSON object with one of these structures:
                 return _result
             else:
                 # Button not found — check if page already transitioned (button was clicked in a previous turn)
-                check_url = run_agent_browser_command(["get", "url"]).strip()
+                check_url = run_agent_browser_command(_CMD_GET_URL).strip()
                 logger.info(f"Auto-recovery: button not found, checking URL: {check_url}")
                 if "find-people" not in check_url.lower() and "login" not in check_url.lower():
                     logger.info("Page already transitioned — waiting for import with stabilization mode...")
@@ -2400,160 +3504,6 @@ Return ONLY a JSON object with one of these structures:
                 debug_state.fail_run(f"Agent Failure: {action.get('reason')}")
                 raise Exception(f"Agent Failure: {action.get('reason')}")
             
-        elif action_type == "click":
-            eid = action.get("element_id")
-            res = run_agent_browser_command(["click", eid])
-            if res.startswith("Error:"):
-                last_error = res
-                logger.warning(f"Click failed: {res}")
-            else:
-                time.sleep(2) # Wait for UI reaction
-            
-        elif action_type == "fill":
-            eid = action.get("element_id")
-            val = action.get("value")
-            res = run_agent_browser_command(["fill", eid, val])
-            if res.startswith("Error:"):
-                last_error = res
-                logger.warning(f"Fill failed: {res}")
-            else:
-                # Often need to press enter for pills, but ONLY if fill succeeded
-                run_agent_browser_command(["press", "Enter"]) 
-                run_agent_browser_command(["press", "Enter"]) 
-                time.sleep(1)
-            
-        elif action_type == "wait":
-            wait_secs = min(action.get("seconds", 5), 15)  # Cap at 15 seconds
-            logger.info(f"Agent waiting {wait_secs}s: {action.get('reason', 'no reason')}")
-            time.sleep(wait_secs)
-
-        elif action_type == "press":
-            key = action.get("key", "Enter")
-            res = run_agent_browser_command(["press", key])
-            if res.startswith("Error:"):
-                last_error = res
-                logger.warning(f"Press failed: {res}")
-            else:
-                time.sleep(1)
-
-        elif action_type == "fill_placeholder":
-            ph = action.get("placeholder")
-            val = action.get("value")
-            focus_res = focus_input_by_text(ph)
-            if "Element not found" in focus_res:
-                last_error = f"Placeholder '{ph}' not found"
-                logger.warning(last_error)
-            else:
-                time.sleep(0.3)
-                res = run_agent_browser_command(["fill", ":focus", val])
-                if res.startswith("Error:"):
-                    last_error = res
-                    logger.warning(f"Fill-Placeholder failed: {res}")
-                else:
-                    run_agent_browser_command(["press", "Enter"])
-                    time.sleep(1)
-
-        elif action_type == "fill_label":
-            lbl = action.get("label")
-            val = action.get("value")
-            focus_res = focus_input_by_text(lbl)
-            if "Element not found" in focus_res:
-                last_error = f"Label '{lbl}' not found"
-                logger.warning(last_error)
-            else:
-                time.sleep(0.3)
-                res = run_agent_browser_command(["fill", ":focus", val])
-                if res.startswith("Error:"):
-                    last_error = res
-                    logger.warning(f"Fill-Label failed: {res}")
-                else:
-                    run_agent_browser_command(["press", "Enter"])
-                    time.sleep(1)
-
-        elif action_type == "focus_placeholder":
-            # Focus an element by placeholder/aria-label without typing
-            ph = action.get("placeholder")
-            res = focus_input_by_text(ph)
-            if "Element not found" in res:
-                last_error = f"Placeholder '{ph}' not found via JS"
-                logger.warning(last_error)
-            else:
-                logger.info(f"JS Focus result: {res}")
-                time.sleep(0.5)
-
-        elif action_type == "type_and_enter":
-            # Type text into a multi-select input then press Enter to create a pill.
-            # Uses snapshot -i to find the target input ref instead of broken `fill :focus`.
-            val = action.get("value")
-            ph = action.get("placeholder", "")
-
-            # Split comma-separated values if needed
-            if "," in val:
-                parts = [v.strip() for v in val.split(",") if v.strip()]
-                if len(parts) > 1 and all(len(p) > 3 for p in parts):
-                    values = parts
-                else:
-                    values = [val]
-            else:
-                values = [val]
-            logger.info(f"type_and_enter: {len(values)} value(s) to enter")
-
-            snap = run_agent_browser_command(["snapshot", "-i"])
-            any_error = None
-            for i, single_val in enumerate(values):
-                # Find the target input via snapshot -i
-                input_ref = None
-
-                # Strategy 1: find expanded combobox (indicates active input)
-                for line in snap.split('\n'):
-                    if ('combobox' in line.lower() or 'textbox' in line.lower()) and '[ref=' in line:
-                        if '[expanded]' in line:
-                            parts = line.split('[ref=')
-                            if len(parts) > 1:
-                                input_ref = parts[1].split(']')[0]
-                                break
-
-                # Strategy 2: use placeholder text from action
-                if not input_ref and ph:
-                    input_ref = parse_ref(snap, ph)
-
-                # Strategy 3: find unlabeled combobox not matching known sections
-                if not input_ref:
-                    for line in snap.split('\n'):
-                        if 'combobox' in line.lower() and '[ref=' in line:
-                            if not any(kw in line.lower() for kw in ['seniority', 'function', 'cities', 'countries', 'regions', 'states']):
-                                parts = line.split('[ref=')
-                                if len(parts) > 1:
-                                    input_ref = parts[1].split(']')[0]
-                                    break
-
-                if input_ref:
-                    res = run_agent_browser_command(["fill", f"@{input_ref}", single_val])
-                    if res and res.startswith("Error:"):
-                        any_error = res
-                        logger.warning(f"Type (Fill) failed for '{single_val}': {res}")
-                        break
-                    time.sleep(1)
-                    run_agent_browser_command(["press", "Enter"])
-                    time.sleep(1)
-                    run_agent_browser_command(["press", "Escape"])
-                    time.sleep(0.5)
-                    snap = run_agent_browser_command(["snapshot", "-i"])
-                    logger.info(f"Pill {i+1}/{len(values)} entered: '{single_val}'")
-                else:
-                    # Fallback: JS execCommand on active element
-                    safe_val = single_val.replace("'", "\\'")
-                    run_agent_browser_command(["eval",
-                        f"document.activeElement && document.execCommand('insertText', false, '{safe_val}')"])
-                    time.sleep(0.5)
-                    run_agent_browser_command(["press", "Enter"])
-                    time.sleep(1)
-                    snap = run_agent_browser_command(["snapshot", "-i"])
-                    logger.info(f"Pill {i+1}/{len(values)} entered via JS fallback: '{single_val}'")
-
-            if any_error:
-                last_error = any_error
-            
         elif action_type == "click_by_text":
             # Click a button/link by its visible text content using JS (case-insensitive).
             btn_text = action.get("text", "")
@@ -2563,31 +3513,24 @@ Return ONLY a JSON object with one of these structures:
             if "add to table" in btn_text.lower():
                 expected_search_count = capture_search_count()
 
-            safe_text = btn_text.replace('"', '\\"').lower()
-            click_js = f"""
-                let btns = document.querySelectorAll('button, a, [role="button"], [class*="button"]');
-                let found = null;
-                for (let b of btns) {{
-                    if (b.textContent.trim().toLowerCase().includes('{safe_text}')) {{
-                        found = b;
-                        break;
-                    }}
-                }}
-                if (found) {{ found.scrollIntoView(); found.click(); 'Clicked: ' + found.textContent.trim() }}
-                else {{ 'Button not found: {safe_text}' }}
-            """
-            res = run_agent_browser_command(["eval", click_js])
-            logger.info(f"click_by_text result: {res}")
+            # Prefer a native ref click from the snapshot already in hand —
+            # native clicks trigger React handlers properly, and the ref
+            # lookup is a local scan instead of a DOM-wide JS iteration.
+            res = ""
+            ref = parse_ref(snapshot_json, btn_text)
+            if ref:
+                click_res = run_agent_browser_command(["click", f"@{ref}"])
+                if not click_res.startswith("Error:"):
+                    res = f"Clicked: @{ref} ({btn_text})"
+                    logger.info(f"click_by_text native click: {res}")
+            if not res:
+                click_js = _CLICK_BY_TEXT_JS % json.dumps(btn_text.lower())
+                res = run_agent_browser_command(["eval", click_js])
+                logger.info(f"click_by_text result: {res}")
             if "Button not found" in res:
                 # Auto-recovery: scroll sidebar to top and retry
                 logger.info("Button not found — scrolling sidebar to top and retrying...")
-                reset_js = """
-                    let panels = document.querySelectorAll('[class*="sidebar"], [class*="filter"], [class*="panel"], [class*="scroll"]');
-                    for (let p of panels) { p.scrollTop = 0; }
-                    window.scrollTo(0, 0);
-                    'Reset scroll'
-                """
-                run_agent_browser_command(["eval", reset_js])
+                run_agent_browser_command(["eval", _RESET_SCROLL_JS])
                 time.sleep(1)
                 # Retry click
                 res2 = run_agent_browser_command(["eval", click_js])
@@ -2595,9 +3538,9 @@ Return ONLY a JSON object with one of these structures:
                 if "Button not found" in res2:
                     last_error = f"Button '{btn_text}' not found even after scroll reset"
                 else:
-                    time.sleep(2)
+                    wait_for_dom_change(timeout=2)
             else:
-                time.sleep(2)  # Wait for UI reaction
+                wait_for_dom_change(timeout=2)  # Wait for UI reaction, return early once it happens
                 # Auto-complete: if we just clicked "Add to table", the import is triggered
                 if "add to table" in btn_text.lower():
                     logger.info("'Add to table' clicked successfully — import triggered.")
@@ -2622,26 +3565,21 @@ Return ONLY a JSON object with one of these structures:
                     debug_state.complete_run(_result)
                     return _result
 
-        elif action_type == "scroll":
-            direction = action.get("direction", "down")
-            pixels = action.get("pixels", 500)
-            sign = "" if direction == "down" else "-"
-            # Try scrolling the filter panel first, fall back to window scroll
-            scroll_js = f"""
-                let panel = document.querySelector('[class*="sidebar"]')
-                    || document.querySelector('[class*="filter"]')
-                    || document.querySelector('[class*="panel"]');
-                if (panel) {{ panel.scrollBy(0, {sign}{pixels}); 'Scrolled panel' }}
-                else {{ window.scrollBy(0, {sign}{pixels}); 'Scrolled window' }}
-            """
-            res = run_agent_browser_command(["eval", scroll_js])
-            logger.info(f"Scroll result: {res}")
-            time.sleep(1)
-
         else:
             logger.warning(f"Unknown action type: {action_type}")
             last_error = f"Unknown action type: {action_type}"
 
+        # Action-cache store: remember decisions that executed cleanly so an
+        # identical page state can replay them without a model call. Errored
+        # decisions are evicted so the model gets another look next time.
+        if action_type in _CACHEABLE_ACTIONS:
+            if last_error:
+                _action_cache.pop(cache_key, None)
+            else:
+                if len(_action_cache) >= _ACTION_CACHE_MAX:
+                    _action_cache.clear()
+                _action_cache[cache_key] = raw_text
+
         # Debug: record this turn's outcome
         debug_state.record_turn(
             turn=turn,
@@ -110,13 +110,28 @@ def trigger_automation():
     
     if not jobseekers:
         return jsonify({"message": "No job seekers found to process."}), 200
-    
+
+    # Prefetch GPT-4o criteria interpretation for all jobseekers in parallel.
+    # The browser work itself stays serial (one shared Chromium daemon), but
+    # this overlaps the API latency instead of paying it per record.
+    prefetched_criteria = {}
+    if len(jobseekers) > 1:
+        from concurrent.futures import ThreadPoolExecutor
+        from agent_orchestrator import interpret_search_criteria
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            futures = {js["id"]: pool.submit(interpret_search_criteria, js) for js in jobseekers}
+        for js_id, fut in futures.items():
+            try:
+                prefetched_criteria[js_id] = fut.result()
+            except Exception as e:
+                logger.warning(f"Criteria prefetch failed for {js_id}, will interpret inline: {e}")
+
     results = []
     for js in jobseekers:
         js_id = js["id"]
         try:
             # Capture result dict instead of boolean
-            result = run_automation_for_jobseeker(js)
+            result = run_automation_for_jobseeker(js, search_criteria=prefetched_criteria.get(js_id))
 
             # Extract profile count and timestamp
             profiles_triggered = result.get("profiles_triggered", 0) if isinstance(result, dict) else 0